@@ -0,0 +1,245 @@
+"""
+Bulk Build
+----------
+
+Computes the k_sum, subtree gold total and top-k summary of every node of a mine given
+as an edge list, splitting independent subtrees across a process pool.
+
+The edges are first laid out in pre-order, so every subtree is a contiguous range of
+positions and every parent comes before its children. Subtrees of at most
+n / (workers * 8) nodes are cut off the top of the tree and consecutive ones are grouped
+into ranges of similar size. Each worker attaches to the input and output arrays in
+shared memory (parent position and gold in; k_sum, subtree total, summary length and a
+block of k slots per position for the summary out), computes its range bottom-up and
+only sends back the top-k list of each subtree root it owns. The remaining nodes at the
+top of the tree are then finished in the parent process from those summaries, and the
+summaries are packed into one flat array. No Node objects are pickled.
+
+The result uses the same pre-order arrays as a version 2 Tree snapshot, including the
+summary lengths and the summaries in min-heap order, so Tree.from_edges restores the
+nodes exactly like Tree.load does.
+"""
+
+import heapq
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# Below this many nodes starting a process pool costs more than it saves
+PARALLEL_THRESHOLD = 10000
+
+
+def layout(edges: list[tuple]) -> tuple[list, array, array]:
+	"""
+	Lays the edges out in pre-order, children in the order their edges were given.
+	:param edges: (parent_id, child_id, gold) tuples, exactly one with parent_id None for the root.
+	:return: The ids in pre-order, the parent position of each position (-1 for the root) and the gold.
+	"""
+	index = {}
+	golds = []
+	parent_ids = []
+	for parent_id, child_id, gold in edges:
+		if child_id in index:
+			raise ValueError("Node {} appears as a child twice".format(child_id))
+		index[child_id] = len(golds)
+		golds.append(gold)
+		parent_ids.append(parent_id)
+
+	roots = [i for i, parent_id in enumerate(parent_ids) if parent_id is None]
+	if len(roots) != 1:
+		raise ValueError("Expected exactly one root edge, found {}".format(len(roots)))
+	parent_index = []
+	children = [[] for _ in golds]
+	for i, parent_id in enumerate(parent_ids):
+		if parent_id is None:
+			parent_index.append(-1)
+			continue
+		if parent_id not in index:
+			raise ValueError("Parent {} is never added as a node".format(parent_id))
+		parent_index.append(index[parent_id])
+		children[parent_index[-1]].append(i)
+
+	ids = list(index)
+	order = []
+	position = [-1] * len(golds)
+	stack = [roots[0]]
+	while stack:
+		i = stack.pop()
+		position[i] = len(order)
+		order.append(i)
+		stack.extend(reversed(children[i]))
+	if len(order) != len(golds):
+		raise ValueError("The edges do not form a single tree")
+
+	# parent_index is -1 for the root, which now reads this sentinel
+	position.append(-1)
+	parents = array("q", [position[parent_index[i]] for i in order])
+	gold = array("q", [golds[i] for i in order])
+	return [ids[i] for i in order], parents, gold
+
+
+def summarise_range(lo: int, hi: int, parents, gold, k_sums, sub_sums, counts, tops, k: int) -> list[tuple]:
+	"""
+	Computes k_sum, subtree total and top-k summary for every position in [lo, hi), which
+	must be a run of complete subtrees, writing them into k_sums, sub_sums, counts and tops.
+	The summary of position pos is stored ascending, so in min-heap order, at tops[pos * k:].
+	:return: (position, top-k list, subtree total) for every position whose parent is outside the range.
+	"""
+	pending = {}
+	pending_sums = {}
+	found = []
+	for pos in range(hi - 1, lo - 1, -1):
+		candidates = pending.pop(pos, [])
+		candidates.append(gold[pos])
+		top = heapq.nlargest(k, candidates)
+		total = gold[pos] + pending_sums.pop(pos, 0)
+		k_sums[pos] = sum(top)
+		sub_sums[pos] = total
+		store(counts, tops, k, pos, top)
+		parent = parents[pos]
+		if parent >= lo:
+			pending.setdefault(parent, []).extend(top)
+			pending_sums[parent] = pending_sums.get(parent, 0) + total
+		else:
+			found.append((pos, top, total))
+	return found
+
+
+def store(counts, tops, k: int, pos: int, top: list[int]) -> None:
+	"""
+	Writes the top-k list of a position, highest first, into its k slots of tops in min-heap order.
+	"""
+	count = len(top)
+	counts[pos] = count
+	tops[pos * k:pos * k + count] = array("q", reversed(top))
+
+
+def pack(counts, tops, k: int) -> array:
+	"""
+	Packs the summaries stored k slots apart into one flat array, as in a snapshot.
+	"""
+	packed = array("q")
+	for pos, count in enumerate(counts):
+		packed.extend(tops[pos * k:pos * k + count])
+	return packed
+
+
+def _worker(names: tuple[str, ...], n: int, ranges: list[tuple[int, int]], k: int) -> list[tuple]:
+	"""
+	Process pool entry point: attaches to the shared arrays and summarises the given ranges.
+	"""
+	blocks = [shared_memory.SharedMemory(name=name) for name in names]
+	views = [block.buf[:8 * n].cast("q") for block in blocks[:-1]] + [blocks[-1].buf[:8 * n * k].cast("q")]
+	try:
+		found = []
+		for lo, hi in ranges:
+			found += summarise_range(lo, hi, *views, k)
+		return found
+	finally:
+		for view in views:
+			view.release()
+		for block in blocks:
+			block.close()
+
+
+def plan(parents: array, workers: int) -> tuple[list[list[tuple[int, int]]], list[int]]:
+	"""
+	Splits the pre-order positions into ranges of complete subtrees for the workers.
+	:return: The ranges of each task, and the positions left at the top of the tree.
+	"""
+	n = len(parents)
+	size = [1] * n
+	for pos in range(n - 1, 0, -1):
+		size[parents[pos]] += size[pos]
+	target = max(1, n // (workers * 8))
+
+	tasks = []
+	current = []
+	current_size = 0
+	top = []
+	pos = 0
+	while pos < n:
+		if size[pos] > target:
+			top.append(pos)
+			pos += 1
+			continue
+		current.append((pos, pos + size[pos]))
+		current_size += size[pos]
+		pos += size[pos]
+		if current_size >= target:
+			tasks.append(current)
+			current = []
+			current_size = 0
+	if current:
+		tasks.append(current)
+	return tasks, top
+
+
+def build(edges: list[tuple], k: int, workers: int = None) -> tuple[list, array, array, array, array, array, array]:
+	"""
+	Computes the pre-order layout, k_sums, subtree totals and top-k summaries of the mine described by the edges.
+	:param edges: (parent_id, child_id, gold) tuples, exactly one with parent_id None for the root.
+	:param k: Value used to calculate k_sum.
+	:param workers: Number of worker processes; defaults to the number of CPUs. 1 computes in-process.
+	:return: The ids in pre-order, and the parent position, gold, k_sum, subtree total, summary
+		length and packed summary arrays.
+	"""
+	ids, parents, gold = layout(edges)
+	n = len(ids)
+	workers = workers or os.cpu_count() or 1
+	if workers == 1 or n < PARALLEL_THRESHOLD:
+		k_sums = array("q", [0]) * n
+		sub_sums = array("q", [0]) * n
+		counts = array("q", [0]) * n
+		tops = array("q", [0]) * (n * k)
+		summarise_range(0, n, parents, gold, k_sums, sub_sums, counts, tops, k)
+		return ids, parents, gold, k_sums, sub_sums, counts, pack(counts, tops, k)
+
+	tasks, top = plan(parents, workers)
+	blocks = [shared_memory.SharedMemory(create=True, size=8 * n) for _ in range(5)]
+	blocks.append(shared_memory.SharedMemory(create=True, size=8 * max(1, n * k)))
+	views = [block.buf[:8 * n].cast("q") for block in blocks[:-1]] + [blocks[-1].buf[:8 * n * k].cast("q")]
+	try:
+		views[0][:] = parents
+		views[1][:] = gold
+		names = tuple(block.name for block in blocks)
+		roots = {}
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			futures = [pool.submit(_worker, names, n, ranges, k) for ranges in tasks]
+			for future in futures:
+				for pos, found, total in future.result():
+					roots[pos] = (found, total)
+
+		# The top positions form the upper part of the tree; finish them bottom-up, each
+		# subtree root computed by a worker standing in for its whole subtree.
+		pending = {}
+		pending_sums = {}
+		for pos, (found, total) in roots.items():
+			parent = parents[pos]
+			pending.setdefault(parent, []).extend(found)
+			pending_sums[parent] = pending_sums.get(parent, 0) + total
+		for pos in reversed(top):
+			candidates = pending.pop(pos, [])
+			candidates.append(gold[pos])
+			found = heapq.nlargest(k, candidates)
+			total = gold[pos] + pending_sums.pop(pos, 0)
+			views[2][pos] = sum(found)
+			views[3][pos] = total
+			store(views[4], views[5], k, pos, found)
+			parent = parents[pos]
+			if parent >= 0:
+				pending.setdefault(parent, []).extend(found)
+				pending_sums[parent] = pending_sums.get(parent, 0) + total
+
+		k_sums = array("q", views[2])
+		sub_sums = array("q", views[3])
+		counts = array("q", views[4])
+		tops = pack(counts, array("q", views[5]), k)
+	finally:
+		for view in views:
+			view.release()
+		for block in blocks:
+			block.close()
+			block.unlink()
+	return ids, parents, gold, k_sums, sub_sums, counts, tops
@@ -0,0 +1,335 @@
+"""
+Euler Tree
+----------
+
+This class is an alternative Tree backend for workloads dominated by k_sum queries,
+gold updates and subtree moves.
+
+Every node is represented by an enter token and an exit token, laid out in Euler-tour
+order so that every subtree is the contiguous range between its node's two tokens.
+The tokens are kept in a treap (a randomised balanced binary search tree ordered by
+position) whose nodes store the top-k gold values of their treap subtree, highest
+first. Cutting a subtree out and linking it in somewhere else is then a handful of
+treap splits and merges, so k_sum and update_gold cost O(k log n) expected, and the
+aggregates stay correct along both the old and new root paths without any rebuild.
+put costs the same plus marking the Nodes dirty, which stops at the first ancestor
+already dirty: O(1) while only the index is queried, O(depth) after a Node k_sum read. move_subtree
+also has to unlink node_a from its old parent's children list, which adds O(degree) of
+that parent. melt_subtree costs O(k log n) plus the size of the melted subtree.
+
+The pointer-based Nodes are still kept up to date, so the tree can be used wherever a
+Tree is expected. Gold must be updated through EulerTree.update_gold for the index to
+see it. Nodes added outside the tree are indexed the first time the tree sees them.
+
+Each EulerTree consists of the following properties:
+	- root: The root of the Tree
+	- k: The k shared by every node of the Tree
+	- enter: The enter token of each indexed node
+	- exit: The exit token of each indexed node
+
+The class also supports the following functions:
+	- put(node_a, node_b): Adds node_b as the last child of node_a
+	- update_gold(node, gold): Updates the gold of the node and the index
+	- k_sum(node): Returns the k_sum of the node from the index
+	- move_subtree(node_a, node_b): Move node_a to the last child of node_b
+	- melt_subtree(node): Removes the subtree of the node and updates the node's gold with the sum of its subtree
+"""
+
+import random
+
+from Node import Node
+from Tree import Tree
+
+
+def merge_top(left: list[int], right: list[int], k: int) -> list[int]:
+	"""
+	Merges two lists sorted highest first, keeping the k highest values. Costs O(k).
+	:param left: The first sorted list.
+	:param right: The second sorted list.
+	:param k: The number of values to keep.
+	:return: The merged list, highest first.
+	"""
+	if not left:
+		return right[:k]
+	if not right:
+		return left[:k]
+	merged = []
+	i = j = 0
+	while len(merged) < k and i < len(left) and j < len(right):
+		if left[i] >= right[j]:
+			merged.append(left[i])
+			i += 1
+		else:
+			merged.append(right[j])
+			j += 1
+	if len(merged) < k:
+		merged += left[i:i + k - len(merged)]
+		merged += right[j:j + k - len(merged)]
+	return merged
+
+
+class _Token():
+	"""
+	A treap node holding one enter or exit token of the Euler tour.
+	Exit tokens carry no gold.
+	"""
+	__slots__ = ('node', 'gold', 'priority', 'left', 'right', 'parent', 'size', 'top')
+
+	def __init__(self, node: Node, gold: int = None) -> None:
+		self.node = node
+		self.gold = gold
+		self.priority = random.random()
+		self.left = None
+		self.right = None
+		self.parent = None
+		self.size = 1
+		self.top = [] if gold is None else [gold]
+
+
+def _size(token: _Token) -> int:
+	return 0 if token is None else token.size
+
+
+def _pull(token: _Token, k: int) -> None:
+	"""
+	Recomputes the size and top-k aggregate of a treap node from its children. Costs O(k).
+	"""
+	token.size = 1 + _size(token.left) + _size(token.right)
+	top = [] if token.gold is None else [token.gold]
+	if token.left is not None:
+		top = merge_top(token.left.top, top, k)
+	if token.right is not None:
+		top = merge_top(top, token.right.top, k)
+	token.top = top
+
+
+def _merge(a: _Token, b: _Token, k: int) -> _Token:
+	"""
+	Concatenates two treaps and returns the root of the result.
+	"""
+	if a is None:
+		return b
+	if b is None:
+		return a
+	if a.priority > b.priority:
+		a.right = _merge(a.right, b, k)
+		a.right.parent = a
+		_pull(a, k)
+		return a
+	b.left = _merge(a, b.left, k)
+	b.left.parent = b
+	_pull(b, k)
+	return b
+
+
+def _split(token: _Token, count: int, k: int) -> tuple[_Token, _Token]:
+	"""
+	Splits a treap into its first count tokens and the rest.
+	"""
+	if token is None:
+		return None, None
+	if _size(token.left) >= count:
+		left, token.left = _split(token.left, count, k)
+		if token.left is not None:
+			token.left.parent = token
+		if left is not None:
+			left.parent = None
+		_pull(token, k)
+		return left, token
+	token.right, right = _split(token.right, count - _size(token.left) - 1, k)
+	if token.right is not None:
+		token.right.parent = token
+	if right is not None:
+		right.parent = None
+	_pull(token, k)
+	return token, right
+
+
+def _rank(token: _Token) -> int:
+	"""
+	Returns the position of a token in its treap.
+	"""
+	position = _size(token.left)
+	while token.parent is not None:
+		if token is token.parent.right:
+			position += _size(token.parent.left) + 1
+		token = token.parent
+	return position
+
+
+def _find_root(token: _Token) -> _Token:
+	while token.parent is not None:
+		token = token.parent
+	return token
+
+
+class EulerTree(Tree):
+	# These are the defined properties as described above
+	k: int
+	enter: dict[Node, _Token]
+	exit: dict[Node, _Token]
+
+	def __init__(self, root: Node = None) -> None:
+		"""
+		The constructor for the EulerTree class.
+		:param root: The root node of the Tree.
+		"""
+		super().__init__(root)
+		self.k = None if root is None else root.k
+		self.enter = {}
+		self.exit = {}
+		if root is not None:
+			self.index(root)
+
+	def index(self, node: Node) -> _Token:
+		"""
+		Indexes the subtree rooted at the node if the tree has not seen it yet, building
+		its treap in O(n k) with a Cartesian-tree pass over the Euler tour.
+		:param node: The root of the subtree to index.
+		:return: The root of the treap holding the node's tokens.
+		"""
+		if node in self.enter:
+			return _find_root(self.enter[node])
+		if self.k is None:
+			self.k = node.k
+		tokens = []
+		stack = [(node, False)]
+		while stack:
+			current, done = stack.pop()
+			if done:
+				token = _Token(current)
+				self.exit[current] = token
+				tokens.append(token)
+				continue
+			token = _Token(current, current.gold)
+			self.enter[current] = token
+			tokens.append(token)
+			stack.append((current, True))
+			for child in reversed(current.children):
+				stack.append((child, False))
+
+		# Standard stack construction: the right spine holds decreasing priorities.
+		spine = []
+		for token in tokens:
+			last = None
+			while spine and spine[-1].priority < token.priority:
+				last = spine.pop()
+			token.left = last
+			if last is not None:
+				last.parent = token
+			if spine:
+				spine[-1].right = token
+				token.parent = spine[-1]
+			spine.append(token)
+
+		# Aggregates bottom-up, children before parents.
+		order = [spine[0]]
+		for token in order:
+			for child in (token.left, token.right):
+				if child is not None:
+					order.append(child)
+		for token in reversed(order):
+			_pull(token, self.k)
+		return spine[0]
+
+	def cut(self, node: Node) -> tuple[_Token, _Token]:
+		"""
+		Cuts the tokens of the node's subtree out of their treap.
+		:param node: The root of the subtree to cut.
+		:return: The treap of the subtree and the root of the remaining treap.
+		"""
+		start = _rank(self.enter[node])
+		end = _rank(self.exit[node])
+		rest, tail = _split(_find_root(self.enter[node]), end + 1, self.k)
+		head, subtree = _split(rest, start, self.k)
+		return subtree, _merge(head, tail, self.k)
+
+	def link(self, subtree: _Token, node: Node) -> None:
+		"""
+		Inserts a treap of tokens just before the node's exit token, making it the last child.
+		:param subtree: The treap to insert.
+		:param node: The new parent.
+		"""
+		self.index(node)
+		position = _rank(self.exit[node])
+		head, tail = _split(_find_root(self.exit[node]), position, self.k)
+		_merge(_merge(head, subtree, self.k), tail, self.k)
+
+	def put(self, node_a: Node, node_b: Node) -> None:
+		"""
+		Adds node_b as the last child of node_a. Costs O(k log n) expected, plus marking
+		the Nodes dirty up to the first ancestor that already is.
+		:param node_a: The node to add the child to.
+		:param node_b: The child to add to the node.
+		"""
+		self.index(node_a)
+		if node_b in self.enter:
+			subtree, _ = self.cut(node_b)
+		else:
+			subtree = self.index(node_b)
+		super().put(node_a, node_b)
+		self.link(subtree, node_a)
+
+	def update_gold(self, node: Node, gold: int) -> None:
+		"""
+		Updates the gold of the node. Costs O(k log n) expected.
+		:param node: The node to update.
+		:param gold: The new gold of the node.
+		"""
+		node.update_gold(gold)
+		if node not in self.enter:
+			return
+		token = self.enter[node]
+		token.gold = gold
+		while token is not None:
+			_pull(token, self.k)
+			token = token.parent
+
+	def k_sum(self, node: Node) -> int:
+		"""
+		Returns the k_sum of the node. Costs O(k log n) expected.
+		:param node: The node to query.
+		:return: The sum of the k highest gold values in the subtree of the node.
+		"""
+		self.index(node)
+		start = _rank(self.enter[node])
+		end = _rank(self.exit[node])
+		rest, tail = _split(_find_root(self.enter[node]), end + 1, self.k)
+		head, subtree = _split(rest, start, self.k)
+		total = sum(subtree.top)
+		_merge(_merge(head, subtree, self.k), tail, self.k)
+		return total
+
+	def move_subtree(self, node_a: Node, node_b: Node) -> None:
+		"""
+		The subtree rooted at node_a is made into the last child of node_b. Costs O(k log n) expected
+		plus O(degree) of the old parent, to remove node_a from its children list.
+		:param node_a: The root of the subtree to move.
+		:param node_b: The node to add the subtree to.
+		"""
+		super().move_subtree(node_a, node_b)
+		self.index(node_a)
+		subtree, _ = self.cut(node_a)
+		self.link(subtree, node_b)
+
+	def melt_subtree(self, node_a: Node) -> None:
+		"""
+		Removes the subtree rooted at node_a and updates the gold value of node_a with the sum of the gold in its subtree.
+		:param node_a: The root of the subtree to melt.
+		"""
+		self.index(node_a)
+		position = _rank(self.enter[node_a])
+		subtree, rest = self.cut(node_a)
+		stack = [subtree]
+		while stack:
+			token = stack.pop()
+			self.enter.pop(token.node, None)
+			self.exit.pop(token.node, None)
+			for child in (token.left, token.right):
+				if child is not None:
+					stack.append(child)
+
+		super().melt_subtree(node_a)
+		melted = self.index(node_a)
+		head, tail = _split(rest, position, self.k)
+		_merge(_merge(head, melted, self.k), tail, self.k)
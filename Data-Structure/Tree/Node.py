@@ -2,13 +2,28 @@
 Tree Node
 ----------
 
-This class represents an individual Node in a Tree. 
+This class represents an individual Node in a Tree.
 
 Each Node consists of the following properties:
 	- children: List of child Nodes
 	- parent: Pointer to the parent Node in the tree
 	- gold: The gold at this point
 	- k_sum: The sum of the k highest gold values in the subtree rooted at this node
+	- sub_sum: The total gold in the subtree rooted at this node, recomputed with k_sum when dirty
+	- subtree_gold: TopK summary of the k highest gold values in the subtree, None if it has not been built yet,
+	  or a (saved summaries, index) reference into a loaded snapshot until summary() first needs it
+	- dirty: True if subtree_gold and k_sum are stale and must be recomputed before being read
+	- version: Bumped by every mutation that reaches this node while it is a root, so that
+	  indexes over its tree can tell they are stale
+
+Mutations do not recompute anything: they mark the node and its ancestors dirty in
+O(depth), stopping at the first ancestor that is already dirty (every ancestor of a
+dirty node is dirty too). Reading k_sum recomputes only the dirty nodes, bottom-up,
+from the summaries cached on their clean children, which costs O(degree * k * log k)
+per dirty node. Gold updates on a clean node are applied to the clean ancestors right
+away instead: an increase updates each ancestor's summary in O(k), and a decrease
+only recomputes the ancestors whose top k held the old gold, then adjusts the gold
+totals above them. Nodes in the same tree must share the same k.
 
 The class also supports the following functions:
 	- add_child(Node): Adds the given Node as a child
@@ -16,19 +31,26 @@ The class also supports the following functions:
 	- get_children(): Returns the children of this node
 	- update_gold(int): Updates the gold value at this node to the given value
 	- return_k_sum(): Returns the k_sum at this node
+	- summary(): Returns the TopK summary of a clean node
 """
 
+from Stats import STATS
+from TopK import TopK
+
 
 class Node():
+	# Slots instead of a per-instance __dict__ keep large mines compact
+	__slots__ = ('children', 'parent', 'gold', 'k', '_k_sum', '_sub_sum', 'subtree_gold', 'dirty', 'version')
+
 	# These are the defined properties as described above
 	children: list['Node']
 	parent: 'Node'
 	gold: int
-	k_sum: int
 	k: int
-	sub_sum: int
-	subtree_gold: list
-	
+	subtree_gold: TopK
+	dirty: bool
+	version: int
+
 	def __init__(self, gold: int, k: int) -> None:
 		"""
 		The constructor for the Node class.
@@ -37,12 +59,48 @@ class Node():
 		"""
 		self.gold = gold
 		self.k = k
-		self.k_sum = 0
-		self.sub_sum = gold
-		self.subtree_gold = [gold]
+		self._k_sum = gold
+		self._sub_sum = gold
+		self.subtree_gold = TopK(k, [gold])
+		self.dirty = False
+		self.version = 0
 		self.children = []
 		self.parent = None
 
+	@classmethod
+	def restore(cls, gold: int, k: int, k_sum: int, sub_sum: int, subtree_gold=None) -> 'Node':
+		"""
+		Creates a node whose k_sum and sub_sum are already known, e.g. loaded from a snapshot.
+		Without a top-k summary, one is only built if a mutation below it needs it.
+		:param gold: The gold of the node.
+		:param k: Value used to calculate k_sum.
+		:param k_sum: The known k_sum of the node's subtree.
+		:param sub_sum: The known total gold of the node's subtree.
+		:param subtree_gold: The known top-k summary of the node's subtree or a reference to it, if any.
+		:return: The restored node.
+		"""
+		node = cls.__new__(cls)
+		node.gold = gold
+		node.k = k
+		node._k_sum = k_sum
+		node._sub_sum = sub_sum
+		node.subtree_gold = subtree_gold
+		node.dirty = False
+		node.version = 0
+		node.children = []
+		node.parent = None
+		return node
+
+	@property
+	def k_sum(self) -> int:
+		return self.return_k_sum()
+
+	@property
+	def sub_sum(self) -> int:
+		if self.dirty:
+			self.return_k_sum()
+		return self._sub_sum
+
 	def add_child(self, node: 'Node') -> None:
 		"""
 		Adds the given node as a child of the current node.
@@ -51,7 +109,7 @@ class Node():
 		"""
 		self.children.append(node)
 		node.parent = self
-		self.k_sum = self.return_k_sum()
+		self.mark_dirty()
 
 	def is_external(self) -> bool:
 		"""
@@ -62,11 +120,21 @@ class Node():
 
 	def update_gold(self, gold: int) -> None:
 		"""
-		Updates the gold of the current node.
+		Updates the gold of the current node. On a clean node an increase costs O(depth * k)
+		and a decrease O(depth) plus recomputing the ancestors whose top k held the old gold;
+		otherwise the root path is marked dirty.
 		:param gold: The new gold of the node.
 		"""
-		self.gold = gold
-		self.k_sum = self.return_k_sum()
+		marker = STATS.start() if STATS.enabled else None
+		if self.dirty or self.subtree_gold is None:
+			self.gold = gold
+			self.mark_dirty()
+		elif gold >= self.gold:
+			self.raise_gold(gold)
+		else:
+			self.lower_gold(gold)
+		if marker:
+			STATS.record("update_gold", marker)
 
 	def get_children(self) -> list['Node']:
 		"""
@@ -75,33 +143,169 @@ class Node():
 		"""
 		return self.children
 
-	def get_all_sub_nodes(self) -> None:
-		self.subtree_gold = [self.gold]
-		for child in self.children:
-			child.get_all_sub_nodes()
-			self.subtree_gold += child.subtree_gold
+	def get_all_sub_nodes(self) -> list[int]:
+		"""
+		Returns the gold of every node in the subtree rooted at the current node.
+		:return: The gold values of the subtree, in pre-order.
+		"""
+		subtree = []
+		stack = [self]
+		while stack:
+			node = stack.pop()
+			subtree.append(node.gold)
+			stack.extend(reversed(node.children))
+		if STATS.enabled:
+			STATS.visited += len(subtree)
+		return subtree
+
+	def mark_dirty(self) -> None:
+		"""
+		Marks the current node and its ancestors dirty. Costs O(depth), stopping early at the
+		first ancestor that is already dirty, so mutations between two reads share one walk.
+		"""
+		node = self
+		visited = 0
+		while node is not None and not node.dirty:
+			node.dirty = True
+			if node.parent is None:
+				node.version += 1
+			node = node.parent
+			visited += 1
+		if STATS.enabled:
+			STATS.visited += visited
+
+	def raise_gold(self, gold: int) -> None:
+		"""
+		Increases the gold of the current node, which must be clean, and updates the summary,
+		k_sum and sub_sum of each clean ancestor in place. Stops at the first dirty ancestor,
+		which is recomputed from its children anyway, and marks the path dirty from the first
+		ancestor without a summary.
+		:param gold: The new gold of the node, at least the current gold.
+		"""
+		old = self.gold
+		self.gold = gold
+		node = self
+		visited = 0
+		while node is not None and not node.dirty:
+			if node.subtree_gold is None:
+				node.mark_dirty()
+				break
+			summary = node.summary()
+			summary.replace(old, gold)
+			node._k_sum = summary.total
+			node._sub_sum += gold - old
+			if node.parent is None:
+				node.version += 1
+			node = node.parent
+			visited += 1
+		if STATS.enabled:
+			STATS.visited += visited
+
+	def lower_gold(self, gold: int) -> None:
+		"""
+		Decreases the gold of the current node, which must be clean. Each clean ancestor whose
+		summary may hold the old gold is recomputed right away; above the first one that cannot
+		hold it, no top k changes and only sub_sum is adjusted. Stops at the first dirty
+		ancestor and marks the path dirty from the first ancestor without a summary.
+		:param gold: The new gold of the node, below the current gold.
+		"""
+		old = self.gold
+		self.gold = gold
+		node = self
+		visited = 0
+		while node is not None and not node.dirty:
+			if node.subtree_gold is None:
+				node.mark_dirty()
+				return
+			summary = node.summary()
+			# k values above old stay in this subtree, so no top k from here up contains it
+			if len(summary) == node.k and old < summary.heap[0]:
+				break
+			node.refresh()
+			if node.parent is None:
+				node.version += 1
+			node = node.parent
+			visited += 1
+		while node is not None and not node.dirty:
+			node._sub_sum += gold - old
+			if node.parent is None:
+				node.version += 1
+			node = node.parent
+			visited += 1
+		if STATS.enabled:
+			STATS.visited += visited
+
+	def refresh(self) -> None:
+		"""
+		Recomputes the top-k summary and gold total of the current node from its own gold
+		and the summaries cached on its children, which must be clean. Costs O(degree * k * log k).
+		"""
+		if STATS.enabled:
+			STATS.observe("merge_size", 1 + sum(len(child.summary()) for child in self.children))
+		self.subtree_gold = TopK.combine(self.k, self.gold, [child.summary() for child in self.children])
+		self._k_sum = self.subtree_gold.total
+		self._sub_sum = self.gold + sum(child._sub_sum for child in self.children)
+		self.dirty = False
+
+	def summary(self) -> TopK:
+		"""
+		Returns the top-k summary of the current node, which must be clean and have one.
+		A summary still held by a loaded snapshot is turned into a TopK the first time.
+		:return: The summary.
+		"""
+		summary = self.subtree_gold
+		if summary.__class__ is tuple:
+			saved, index = summary
+			summary = self.subtree_gold = TopK.restore(self.k, saved.heap(index).tolist(), self._k_sum)
+		return summary
+
+	def recompute(self) -> None:
+		"""
+		Refreshes every dirty node in the subtree rooted at the current node, children first.
+		Clean children are not visited unless their summary has not been built yet. Uses an
+		explicit stack so that deep chains do not hit the recursion limit.
+		"""
+		order = [self]
+		for node in order:
+			for child in node.children:
+				if child.dirty or child.subtree_gold is None:
+					order.append(child)
+		for node in reversed(order):
+			node.refresh()
+		if STATS.enabled:
+			STATS.visited += len(order)
 
 	def return_k_sum(self) -> int:
 		"""
 		Returns the k_sum of the current node.
 		:return: The k_sum of the current node.
 		"""
-		if self.is_external():
-			self.k_sum = self.gold
-		else:
-			self.get_all_sub_nodes()
-			self.k_sum = 0
-			if len(self.subtree_gold) <= self.k:
-				self.k_sum = sum(self.subtree_gold)
-			else:
-				self.subtree_gold.sort(reverse=True)
-				for i in range(self.k):
-					self.k_sum += self.subtree_gold[i]
-
-		return self.k_sum
-		
-	def parental_recursive_ksum(self) -> None:
-		if self.parent is not None:
-			self.parent.k_sum = self.parent.return_k_sum()
+		if self.dirty:
+			marker = STATS.start() if STATS.enabled else None
+			self.recompute()
+			if marker:
+				STATS.record("recompute", marker)
+		return self._k_sum
 
+	def release(self) -> None:
+		"""
+		Detaches every node below the current node from the tree, clearing their parent
+		and children links so that they can be garbage collected, and marks the current
+		node dirty since its summary still counts them.
+		"""
+		stack = self.children
+		self.children = []
+		released = 0
+		while stack:
+			node = stack.pop()
+			node.parent = None
+			stack += node.children
+			node.children = []
+			released += 1
+		self.mark_dirty()
+		if STATS.enabled:
+			STATS.visited += released
 
+	def parental_recursive_ksum(self) -> None:
+		if self.parent is not None:
+			self.parent.mark_dirty()
@@ -0,0 +1,127 @@
+"""
+Stats
+----------
+
+Optional instrumentation of the Node and Tree hot paths.
+
+Instrumentation is off by default and every instrumented call site first checks
+STATS.enabled, so the cost when disabled is one attribute lookup. When enabled it
+records, per operation (put, update_gold, move_subtree, melt_subtree, batch, top_k_sum,
+and recompute, which return_k_sum records only when the node it reads is dirty):
+	- how many times it ran
+	- its latency, in power-of-two microsecond buckets
+	- the nodes it visited (dirty marking, recomputation, collection, release), in power-of-two buckets
+and, per event:
+	- merge_size: how many values a node's top-k refresh had to consider
+	- remove_degree: how many children a move_subtree had to search through
+
+Hooks are called after every recorded operation with (operation, seconds, nodes_visited),
+e.g. to export the numbers to a metrics system.
+
+Nodes do not know which Tree they belong to, so the statistics are process-wide.
+Tree.stats() and Tree.add_hook() are shortcuts to the shared STATS instance.
+
+Each Stats consists of the following properties:
+	- enabled: Whether call sites record anything
+	- visited: Running count of nodes visited by traversals
+	- counters: Number of runs of each operation
+	- histograms: Bucket -> count of each latency and size distribution
+	- hooks: Callbacks run after every recorded operation
+
+The class also supports the following functions:
+	- enable() / disable(): Turns recording on or off
+	- start(): Returns the marker to pass to record() at the end of an operation
+	- record(operation, marker): Records one run of an operation
+	- observe(name, value): Adds a value to a histogram
+	- snapshot(): Returns a copy of everything recorded
+	- reset(): Clears everything recorded
+"""
+
+import time
+
+
+def bucket(value: float) -> int:
+	"""
+	Returns the smallest power of two that is at least the value.
+	"""
+	result = 1
+	while result < value:
+		result *= 2
+	return result
+
+
+class Stats():
+	# These are the defined properties as described above
+	enabled: bool
+	visited: int
+	counters: dict[str, int]
+	histograms: dict[str, dict[int, int]]
+	hooks: list
+
+	def __init__(self) -> None:
+		"""
+		The constructor for the Stats class. Recording starts disabled.
+		"""
+		self.enabled = False
+		self.hooks = []
+		self.reset()
+
+	def enable(self) -> None:
+		self.enabled = True
+
+	def disable(self) -> None:
+		self.enabled = False
+
+	def reset(self) -> None:
+		"""
+		Clears everything recorded. Hooks and the enabled flag are kept.
+		"""
+		self.visited = 0
+		self.counters = {}
+		self.histograms = {}
+
+	def observe(self, name: str, value: float) -> None:
+		"""
+		Adds a value to the named power-of-two histogram.
+		:param name: The histogram to add to.
+		:param value: The value to add.
+		"""
+		counts = self.histograms.setdefault(name, {})
+		key = bucket(value)
+		counts[key] = counts.get(key, 0) + 1
+
+	def start(self) -> tuple[float, int]:
+		"""
+		Returns the marker to pass to record() when the operation finishes.
+		:return: The start time and the visited count.
+		"""
+		return time.perf_counter(), self.visited
+
+	def record(self, operation: str, marker: tuple[float, int]) -> None:
+		"""
+		Records one run of an operation and calls the hooks.
+		:param operation: The name of the operation.
+		:param marker: The value start() returned when the operation began.
+		"""
+		seconds = time.perf_counter() - marker[0]
+		nodes = self.visited - marker[1]
+		self.counters[operation] = self.counters.get(operation, 0) + 1
+		self.observe(operation + ".latency_us", seconds * 1e6)
+		self.observe(operation + ".nodes_visited", nodes)
+		for hook in self.hooks:
+			hook(operation, seconds, nodes)
+
+	def snapshot(self) -> dict:
+		"""
+		Returns a copy of everything recorded.
+		:return: {"counters": ..., "histograms": ..., "visited": ...}
+		"""
+		return {
+			"counters": dict(self.counters),
+			"histograms": {name: dict(sorted(counts.items())) for name, counts in self.histograms.items()},
+			"visited": self.visited,
+		}
+
+
+# The process-wide instance used by Node and Tree
+STATS = Stats()
@@ -0,0 +1,131 @@
+"""
+Subtree Index
+----------
+
+This class answers "sum of the k highest gold values in the subtree of a node" for
+any k, without the k fixed at construction time.
+
+The nodes are laid out in Euler-tour (pre-order) order so that every subtree is a
+contiguous range. A merge-sort tree over that order stores, for every segment, its
+gold values sorted ascending together with their prefix sums. A query splits the
+range into O(log n) segments, binary searches the k-th highest value t across them,
+and adds up everything above t plus the copies of t that are needed. Queries cost
+O(log^3 n) for any k; building costs O(n log n) time and memory.
+
+The index is a static snapshot of the tree: it records the version of its root when built
+and is rebuilt by Tree.top_k_sum once a mutation in that tree has reached the root since.
+Mutations in other trees leave it valid.
+
+Each SubtreeIndex consists of the following properties:
+	- version: The version of the root when the index was built, which must be clean
+	- start: Position of each node in Euler-tour order
+	- end: Position one past the last node of each subtree
+	- size: The number of leaves of the merge-sort tree, a power of two
+	- segments: The sorted gold values of every segment, leaves at positions size..2*size-1
+	- prefix: Prefix sums of every segment, prefix[i][j] being the sum of the j lowest values
+	- values: Every gold value in the tree, sorted ascending
+
+The class also supports the following functions:
+	- top_k_sum(node, k): Returns the sum of the k highest gold values in the subtree of the node
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from Node import Node
+
+
+class SubtreeIndex():
+	# These are the defined properties as described above
+	version: int
+	start: dict[Node, int]
+	end: dict[Node, int]
+	size: int
+	segments: list[list[int]]
+	prefix: list[list[int]]
+	values: list[int]
+
+	def __init__(self, root: Node) -> None:
+		"""
+		Builds the index for the tree rooted at the given node.
+		:param root: The root of the tree, which must be clean so that the next mutation bumps its version.
+		"""
+		self.version = root.version
+		self.start = {}
+		self.end = {}
+		order = []
+		stack = [(root, False)]
+		while stack:
+			node, done = stack.pop()
+			if done:
+				self.end[node] = len(order)
+				continue
+			self.start[node] = len(order)
+			order.append(node.gold)
+			stack.append((node, True))
+			for child in reversed(node.children):
+				stack.append((child, False))
+
+		self.size = 1
+		while self.size < len(order):
+			self.size *= 2
+		self.segments = [[] for _ in range(2 * self.size)]
+		for position, gold in enumerate(order):
+			self.segments[self.size + position] = [gold]
+		for i in range(self.size - 1, 0, -1):
+			# sorted() merges the two ascending runs in linear time
+			self.segments[i] = sorted(self.segments[2 * i] + self.segments[2 * i + 1])
+		self.prefix = [[0] + list(accumulate(segment)) for segment in self.segments]
+		self.values = self.segments[1]
+
+	def cover(self, node: Node) -> list[int]:
+		"""
+		Returns the segments that exactly cover the subtree of the node.
+		"""
+		segments = []
+		lo = self.size + self.start[node]
+		hi = self.size + self.end[node]
+		while lo < hi:
+			if lo % 2 == 1:
+				segments.append(lo)
+				lo += 1
+			if hi % 2 == 1:
+				hi -= 1
+				segments.append(hi)
+			lo //= 2
+			hi //= 2
+		return segments
+
+	def top_k_sum(self, node: Node, k: int) -> int:
+		"""
+		Returns the sum of the k highest gold values in the subtree of the node. Costs O(log^3 n).
+		:param node: The root of the subtree.
+		:param k: The number of values to add up.
+		:return: The sum.
+		"""
+		segments = self.cover(node)
+		count = self.end[node] - self.start[node]
+		if k >= count:
+			return sum(self.prefix[i][-1] for i in segments)
+		if k <= 0:
+			return 0
+
+		# Largest t among all values with at least k values >= t inside the subtree.
+		lo, hi = 0, len(self.values) - 1
+		while lo < hi:
+			mid = (lo + hi + 1) // 2
+			threshold = self.values[mid]
+			at_least = sum(len(self.segments[i]) - bisect_left(self.segments[i], threshold) for i in segments)
+			if at_least >= k:
+				lo = mid
+			else:
+				hi = mid - 1
+		threshold = self.values[lo]
+
+		above = 0
+		total = 0
+		for i in segments:
+			position = bisect_right(self.segments[i], threshold)
+			above += len(self.segments[i]) - position
+			total += self.prefix[i][-1] - self.prefix[i][position]
+		return total + (k - above) * threshold
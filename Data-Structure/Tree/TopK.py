@@ -0,0 +1,147 @@
+"""
+TopK
+----------
+
+This class represents the bounded top-k summary kept by every Node of the Tree.
+
+Each TopK consists of the following properties:
+	- k: The maximum number of values kept
+	- heap: Min-heap of the k highest values seen so far
+	- total: The sum of the values in heap
+
+The class also supports the following functions:
+	- push(int): Offers a value to the summary
+	- merge(TopK): Offers every value of another summary to this one
+	- replace(int, int): Raises one value of the summarised multiset
+	- combine(k, int, list[TopK]): Builds the summary of a node from its gold and its children's summaries
+	- restore(k, list[int], int): Wraps a heap and its total that were saved earlier, e.g. in a snapshot
+	- values(): Returns the kept values, highest first
+"""
+
+import heapq
+
+
+class TopK():
+	# One summary lives on every node, so avoid a per-instance __dict__
+	__slots__ = ('k', 'heap', 'total')
+
+	# These are the defined properties as described above
+	k: int
+	heap: list[int]
+	total: int
+
+	def __init__(self, k: int, values: list[int] = ()) -> None:
+		"""
+		The constructor for the TopK class.
+		:param k: The maximum number of values kept.
+		:param values: Initial values to offer to the summary.
+		"""
+		self.k = k
+		self.heap = []
+		self.total = 0
+		for value in values:
+			self.push(value)
+
+	@classmethod
+	def restore(cls, k: int, heap: list[int], total: int) -> 'TopK':
+		"""
+		Creates a summary from a heap that is already in min-heap order, without pushing its values again.
+		:param k: The maximum number of values kept.
+		:param heap: At most k values in min-heap order. The list is kept, not copied.
+		:param total: The sum of the values in heap.
+		:return: The restored summary.
+		"""
+		summary = cls.__new__(cls)
+		summary.k = k
+		summary.heap = heap
+		summary.total = total
+		return summary
+
+	def __len__(self) -> int:
+		return len(self.heap)
+
+	def __iter__(self):
+		return iter(self.heap)
+
+	def copy(self) -> 'TopK':
+		"""
+		Returns an independent copy of the summary in O(k).
+		:return: The copied summary.
+		"""
+		other = TopK(self.k)
+		other.heap = self.heap[:]
+		other.total = self.total
+		return other
+
+	def push(self, value: int) -> bool:
+		"""
+		Offers a value to the summary in O(log k).
+		:param value: The value to offer.
+		:return: True if the value was kept.
+		"""
+		if len(self.heap) < self.k:
+			heapq.heappush(self.heap, value)
+			self.total += value
+			return True
+		if self.k > 0 and value > self.heap[0]:
+			self.total += value - heapq.heapreplace(self.heap, value)
+			return True
+		return False
+
+	def replace(self, old: int, new: int) -> None:
+		"""
+		Updates the summary after one value of the summarised values grew from old to new.
+		If old is kept, one occurrence of it is replaced, otherwise new is offered. Costs O(k).
+		:param old: The previous value, which must be one of the summarised values.
+		:param new: The new value, at least old.
+		"""
+		try:
+			index = self.heap.index(old)
+		except ValueError:
+			self.push(new)
+			return
+		self.heap[index] = new
+		self.total += new - old
+		heapq.heapify(self.heap)
+
+	def merge(self, other: 'TopK') -> bool:
+		"""
+		Offers every value of the other summary to this one in O(len(other) * log k).
+		:param other: The summary to merge in. It is left unchanged.
+		:return: True if any value was kept.
+		"""
+		changed = False
+		for value in other.heap:
+			if self.push(value):
+				changed = True
+		return changed
+
+	@staticmethod
+	def combine(k: int, value: int, summaries: list['TopK']) -> 'TopK':
+		"""
+		Builds a summary from a single value and a list of summaries using small-to-large
+		merging: the largest summary is copied once and the smaller ones are merged into it.
+		:param k: The maximum number of values kept.
+		:param value: The value to offer alongside the summaries.
+		:param summaries: The summaries to merge. They are left unchanged.
+		:return: The combined summary.
+		"""
+		if not summaries:
+			return TopK(k, [value])
+		largest = max(summaries, key=len)
+		if largest.k == k:
+			result = largest.copy()
+		else:
+			result = TopK(k, largest.heap)
+		result.push(value)
+		for summary in summaries:
+			if summary is not largest:
+				result.merge(summary)
+		return result
+
+	def values(self) -> list[int]:
+		"""
+		Returns the kept values, highest first.
+		:return: The kept values.
+		"""
+		return sorted(self.heap, reverse=True)
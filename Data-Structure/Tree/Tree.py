@@ -1,4 +1,16 @@
+import gc
+import mmap
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate, count
+
+import BulkBuild
 from Node import Node
+from Stats import STATS
+from SubtreeIndex import SubtreeIndex
+from TopK import TopK
 
 """
 Tree
@@ -8,17 +20,65 @@ This class represents the Tree used to model our dwarven mine.
 
 Each Tree consists of the following properties:
 	- root: The root of the Tree
+	- batching: The number of open batch() blocks
+	- subtree_index: SubtreeIndex used by top_k_sum, rebuilt after any mutation of this tree
 
 The class also supports the following functions:
 	- put(node_a, node_b): Adds node_b as the last child of node_a
+	- update_gold(node, gold): Updates the gold of the node. Subclasses that index gold override it
 	- move_subtree(node_a, node_b): Move node_a to the last child of node_b. Update k_sum
 	- melt_subtree(node): Removes the subtree of the node and updates the node's gold with the sum of the gold in its subtree. Update k_sum
+	- batch(): Context manager that defers all k_sum work to one post-order pass when it exits
+	- apply_ops(ops): Applies a list of ("put" | "update_gold" | "move_subtree" | "melt_subtree", *args) operations as one batch
+	- top_k_sum(node, k): Returns the sum of the k highest gold values in the subtree of the node, for any k
+	- save(path): Writes the tree to a binary snapshot
+	- load(path): Opens a binary snapshot without recomputing any k_sum
+	- from_edges(edges, k): Builds a tree from (parent, child, gold) edges, summarising subtrees in parallel
+	- stats(): Returns the operation counters and histograms recorded while Stats is enabled
+	- add_hook(hook): Calls hook(operation, seconds, nodes_visited) after every recorded operation
+
+Snapshot layout, little-endian: a header (magic b"MINE", format version, node count n,
+k) followed by five int64 arrays of n entries in pre-order: parent index (-1 for the
+root), gold, k_sum, total subtree gold and the length of the node's top-k summary. A
+last int64 array holds every node's top-k summary in heap order, one after the other,
+so a loaded tree can rebuild a mutated node from its clean children's summaries.
+Version 1 snapshots, without the summaries, can still be loaded.
 """
 
+SNAPSHOT_MAGIC = b"MINE"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sIqq")
+
+
+class SavedSummaries():
+	"""
+	The top-k summaries of a loaded snapshot, kept as two flat arrays. Restored nodes refer
+	to theirs as (saved summaries, pre-order index), and Node.summary() only builds a TopK
+	for the nodes a mutation reaches.
+	"""
+	__slots__ = ('tops', 'starts')
+
+	def __init__(self, counts, tops) -> None:
+		"""
+		:param counts: The length of every node's summary, in pre-order.
+		:param tops: Every node's summary in heap order, one after the other.
+		"""
+		self.tops = array("q", tops)
+		self.starts = array("q", [0])
+		self.starts.extend(accumulate(counts))
+
+	def heap(self, index: int) -> array:
+		"""
+		Returns the saved heap of the node at the pre-order index.
+		"""
+		return self.tops[self.starts[index]:self.starts[index + 1]]
+
 
 class Tree():
 	# These are the defined properties as described above
 	root: Node
+	batching: int
+	subtree_index: SubtreeIndex
 
 	def __init__(self, root: Node = None) -> None:
 		"""
@@ -26,6 +86,8 @@ class Tree():
 		:param root: The root node of the Tree.
 		"""
 		self.root = root
+		self.batching = 0
+		self.subtree_index = None
 
 	def put(self, node_a: Node, node_b: Node) -> None:
 		"""
@@ -34,7 +96,19 @@ class Tree():
 		:param node_a: The node to add the child to.
 		:param node_b: The child to add to the node.
 		"""
+		marker = STATS.start() if STATS.enabled else None
 		node_a.add_child(node_b)
+		if marker:
+			STATS.record("put", marker)
+
+	def update_gold(self, node: Node, gold: int) -> None:
+		"""
+		Updates the gold of the node. Same as node.update_gold(gold), but backends that keep
+		their own index of gold, like EulerTree, override it, so prefer this inside batches.
+		:param node: The node to update.
+		:param gold: The new gold of the node.
+		"""
+		node.update_gold(gold)
 
 	def move_subtree(self, node_a: Node, node_b: Node) -> None:
 		"""
@@ -45,24 +119,219 @@ class Tree():
 		:param node_a: The root of the subtree to move.
 		:param node_b: The node to add the subtree to.
 		"""
-		node_a.parent.children.remove(node_a)
+		marker = None
+		if STATS.enabled:
+			marker = STATS.start()
+			STATS.observe("remove_degree", len(node_a.parent.children))
 		parent_node = node_a.parent
+		parent_node.children.remove(node_a)
+		parent_node.mark_dirty()
 		node_b.add_child(node_a)
-		parent_node.return_k_sum()
-		node_a.return_k_sum()
-		node_a.parental_recursive_ksum()
+		if marker:
+			STATS.record("move_subtree", marker)
 
 	def melt_subtree(self, node_a) -> None:
 		"""
 		Removes the subtree rooted at node_a and updates the gold value of node_a with the sum of the gold in its (removed) subtree. 
 		You must ensure that the k_sum property is correct for all nodes, after removing the subtree and updating the gold value.
 		"""
-		node_a.get_all_sub_nodes()
-		node_a.sub_sum = sum(node_a.subtree_gold)
-		node_a.gold = node_a.sub_sum
-		node_a.return_k_sum()
-		node_a.parental_recursive_ksum()
-		node_a.children=[]
-		
+		marker = STATS.start() if STATS.enabled else None
+		total = node_a.sub_sum
+		node_a.release()
+		node_a.update_gold(total)
+		if marker:
+			STATS.record("melt_subtree", marker)
+
+	@contextmanager
+	def batch(self):
+		"""
+		Buffers the mutations made inside the block: puts, moves and gold decreases only
+		mark the root paths dirty, and the k_sum of every affected node is recomputed
+		once, bottom-up, when the outermost block exits. Gold updates on clean nodes
+		are applied to their ancestors at once (see Node.update_gold). The result is identical to
+		applying the operations one at a time.
+		"""
+		self.batching += 1
+		try:
+			yield self
+		finally:
+			self.batching -= 1
+			if not self.batching and self.root is not None:
+				marker = STATS.start() if STATS.enabled else None
+				self.root.return_k_sum()
+				if marker:
+					STATS.record("batch", marker)
+
+	def apply_ops(self, ops: list[tuple]) -> None:
+		"""
+		Applies a list of operations inside a single batch.
+		Each operation is a tuple of the method name and its arguments, e.g.
+		("put", node_a, node_b), ("update_gold", node, gold), ("move_subtree", node_a, node_b) or ("melt_subtree", node).
+		:param ops: The operations to apply, in order.
+		"""
+		handlers = {
+			"put": self.put,
+			"update_gold": self.update_gold,
+			"move_subtree": self.move_subtree,
+			"melt_subtree": self.melt_subtree,
+		}
+		with self.batch():
+			for name, *args in ops:
+				if name not in handlers:
+					raise ValueError("Unknown operation: {}".format(name))
+				handlers[name](*args)
 
-		
\ No newline at end of file
+	def top_k_sum(self, node: Node, k: int) -> int:
+		"""
+		Returns the sum of the k highest gold values in the subtree of the node, for any k,
+		independently of the k the nodes were built with. Costs O(log^3 n) once the index
+		is built; the index is rebuilt in O(n log n) on the first query after any mutation
+		of this tree, so alternating updates and queries costs O(n log n) per query.
+		:param node: The root of the subtree.
+		:param k: The number of values to add up.
+		:return: The sum.
+		"""
+		marker = STATS.start() if STATS.enabled else None
+		if self.subtree_index is None or self.subtree_index.version != self.root.version:
+			self.root.return_k_sum()
+			self.subtree_index = SubtreeIndex(self.root)
+			if marker:
+				STATS.visited += len(self.subtree_index.start)
+		result = self.subtree_index.top_k_sum(node, k)
+		if marker:
+			STATS.record("top_k_sum", marker)
+		return result
+
+	@staticmethod
+	def stats() -> dict:
+		"""
+		Returns everything recorded since instrumentation was enabled with STATS.enable().
+		Statistics are process-wide, shared by every Tree.
+		:return: {"counters": ..., "histograms": ..., "visited": ...}
+		"""
+		return STATS.snapshot()
+
+	@staticmethod
+	def add_hook(hook) -> None:
+		"""
+		Registers a callback run after every recorded operation while instrumentation is enabled.
+		:param hook: Called as hook(operation, seconds, nodes_visited).
+		"""
+		STATS.hooks.append(hook)
+
+	def save(self, path: str) -> None:
+		"""
+		Writes the tree to a binary snapshot. Costs one recomputation of the dirty nodes and of
+		any nodes whose summary has not been built yet, and one pass over the tree.
+		:param path: The file to write.
+		"""
+		parents = array("q")
+		gold = array("q")
+		k_sums = array("q")
+		sub_sums = array("q")
+		counts = array("q")
+		tops = array("q")
+		k = 0
+		if self.root is not None:
+			k = self.root.k
+			# A node without a summary has none below it either, so this builds them all
+			if self.root.dirty or self.root.subtree_gold is None:
+				self.root.recompute()
+			index = {}
+			stack = [self.root]
+			while stack:
+				node = stack.pop()
+				index[node] = len(parents)
+				parents.append(-1 if node is self.root else index[node.parent])
+				gold.append(node.gold)
+				k_sums.append(node.k_sum)
+				sub_sums.append(node.sub_sum)
+				summary = node.subtree_gold
+				heap = summary[0].heap(summary[1]) if summary.__class__ is tuple else summary.heap
+				counts.append(len(heap))
+				tops.extend(heap)
+				stack.extend(reversed(node.children))
+		columns = (parents, gold, k_sums, sub_sums, counts, tops)
+		if sys.byteorder == "big":
+			for values in columns:
+				values.byteswap()
+		with open(path, "wb") as f:
+			f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(parents), k))
+			for values in columns:
+				values.tofile(f)
+
+	@classmethod
+	def load(cls, path: str) -> 'Tree':
+		"""
+		Opens a binary snapshot written by save(). The arrays are read straight from a
+		memory map and the stored k_sums and top-k summaries are reused, so nothing is
+		recomputed. The summaries stay in one flat array until a mutation needs them, and
+		a later mutation only rebuilds the summaries on its root path. Creating the Nodes
+		still costs about 1µs each.
+		:param path: The file to read.
+		:return: The loaded tree.
+		"""
+		with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data, memoryview(data) as view:
+			magic, version, n, k = SNAPSHOT_HEADER.unpack_from(view)
+			if magic != SNAPSHOT_MAGIC or version not in (1, SNAPSHOT_VERSION):
+				raise ValueError("{} is not a version 1 or {} mine snapshot".format(path, SNAPSHOT_VERSION))
+			columns = []
+			offset = SNAPSHOT_HEADER.size
+			for _ in range(4 if version == 1 else 6):
+				# The summaries column is as long as all the counts together
+				length = sum(columns[4]) if len(columns) == 5 else n
+				column = view[offset:offset + 8 * length].cast("q")
+				if sys.byteorder == "big":
+					column = array("q", column)
+					column.byteswap()
+				columns.append(column)
+				offset += 8 * length
+			nodes = cls.restore_nodes(*columns[:4], k, *columns[4:])
+			for column in columns:
+				if isinstance(column, memoryview):
+					column.release()
+		return cls(nodes[0] if nodes else None)
+
+	@classmethod
+	def from_edges(cls, edges: list[tuple], k: int, workers: int = None) -> tuple['Tree', dict]:
+		"""
+		Builds a tree from an edge list in bulk instead of one put at a time. Independent
+		subtrees are summarised in parallel by a process pool over shared-memory arrays
+		(see BulkBuild), and the nodes are restored with their k_sums and top-k summaries
+		like Tree.load does.
+		:param edges: (parent_id, child_id, gold) tuples, exactly one with parent_id None for the root.
+		:param k: Value used to calculate k_sum.
+		:param workers: Number of worker processes; defaults to the number of CPUs.
+		:return: The tree, and the node of each id.
+		"""
+		ids, parents, gold, k_sums, sub_sums, counts, tops = BulkBuild.build(edges, k, workers)
+		nodes = cls.restore_nodes(parents, gold, k_sums, sub_sums, k, counts, tops)
+		return cls(nodes[0]), dict(zip(ids, nodes))
+
+	@staticmethod
+	def restore_nodes(parents, gold, k_sums, sub_sums, k: int, counts=None, tops=None) -> list[Node]:
+		"""
+		Creates linked nodes from pre-order arrays without recomputing their k_sums.
+		If counts and tops are given, each node also gets its next counts[i] values of tops
+		as its top-k summary, built lazily; otherwise summaries are rebuilt from gold when a
+		mutation needs them.
+		:return: The nodes in pre-order, the root first.
+		"""
+		# Millions of new objects would otherwise trigger repeated full GC passes.
+		gc_was_enabled = gc.isenabled()
+		gc.disable()
+		try:
+			restore = Node.restore
+			if counts is None:
+				nodes = [restore(g, k, k_sum, sub_sum) for g, k_sum, sub_sum in zip(gold, k_sums, sub_sums)]
+			else:
+				saved = SavedSummaries(counts, tops)
+				nodes = [restore(g, k, k_sum, sub_sum, (saved, i)) for i, g, k_sum, sub_sum in zip(count(), gold, k_sums, sub_sums)]
+			for node, parent in zip(nodes[1:], parents[1:]):
+				parent = nodes[parent]
+				parent.children.append(node)
+				node.parent = parent
+		finally:
+			if gc_was_enabled:
+				gc.enable()
+		return nodes
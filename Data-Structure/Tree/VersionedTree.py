@@ -0,0 +1,204 @@
+"""
+Versioned Tree
+----------
+
+This class serves k_sum queries to many reader threads while a single writer applies
+changes.
+
+Readers call snapshot() and get an immutable Snapshot: a persistent segment tree of
+top-k tuples over the Euler-tour order of the mine, plus the layout mapping each node
+to its range. Queries on a Snapshot only read, so any number of threads can share it
+without locks and it never changes underneath them.
+
+The writer publishes a new Snapshot after every change by replacing one attribute,
+which is atomic. A gold update copies only the O(log n) segments on the path from the
+node's leaf to the root, each in O(k), and shares everything else with the previous
+version. Structural changes (put, move_subtree, melt_subtree) are applied to the
+underlying pointer-based Tree and publish a freshly built version in O(n k). Writers
+take a lock among themselves; readers never wait for it.
+
+Each VersionedTree consists of the following properties:
+	- tree: The pointer-based Tree the writer mutates
+	- current: The latest published Snapshot
+	- lock: Serialises writers
+
+The class also supports the following functions:
+	- snapshot(): Returns the latest published Snapshot
+	- update_gold(node, gold): Updates the gold of the node and publishes a new version
+	- put(node_a, node_b): Adds node_b as the last child of node_a and publishes a new version
+	- move_subtree(node_a, node_b): Moves node_a to the last child of node_b and publishes a new version
+	- melt_subtree(node): Melts the subtree of the node and publishes a new version
+"""
+
+import threading
+
+from Node import Node
+from Tree import Tree
+from EulerTree import merge_top
+
+
+class _Segment():
+	"""
+	A persistent segment tree node. Never mutated once created.
+	"""
+	__slots__ = ('top', 'left', 'right')
+
+	def __init__(self, top: tuple, left: '_Segment' = None, right: '_Segment' = None) -> None:
+		self.top = top
+		self.left = left
+		self.right = right
+
+
+def _join(left: _Segment, right: _Segment, k: int) -> _Segment:
+	return _Segment(tuple(merge_top(left.top, right.top, k)), left, right)
+
+
+def _build(golds: list[int], lo: int, hi: int, k: int) -> _Segment:
+	if hi - lo == 1:
+		return _Segment((golds[lo],))
+	mid = (lo + hi) // 2
+	return _join(_build(golds, lo, mid, k), _build(golds, mid, hi, k), k)
+
+
+def _assign(segment: _Segment, lo: int, hi: int, position: int, gold: int, k: int) -> _Segment:
+	"""
+	Returns a new root with the leaf at position set to gold, copying only the path to it.
+	"""
+	if hi - lo == 1:
+		return _Segment((gold,))
+	mid = (lo + hi) // 2
+	if position < mid:
+		return _join(_assign(segment.left, lo, mid, position, gold, k), segment.right, k)
+	return _join(segment.left, _assign(segment.right, mid, hi, position, gold, k), k)
+
+
+class Snapshot():
+	"""
+	An immutable version of the mine. Safe to query from any number of threads.
+	"""
+	__slots__ = ('version', 'k', 'start', 'end', 'size', 'segments')
+
+	def __init__(self, version: int, k: int, start: dict, end: dict, size: int, segments: _Segment) -> None:
+		self.version = version
+		self.k = k
+		self.start = start
+		self.end = end
+		self.size = size
+		self.segments = segments
+
+	def k_sum(self, node: Node) -> int:
+		"""
+		Returns the k_sum of the node in this version. Costs O(k log n).
+		:param node: The node to query.
+		:return: The sum of the k highest gold values in the subtree of the node.
+		"""
+		return sum(self.top(node))
+
+	def top(self, node: Node) -> list[int]:
+		"""
+		Returns the k highest gold values in the subtree of the node in this version, highest first.
+		:param node: The node to query.
+		:return: The values.
+		"""
+		lo = self.start[node]
+		hi = self.end[node]
+		top = []
+		stack = [(self.segments, 0, self.size)]
+		while stack:
+			segment, seg_lo, seg_hi = stack.pop()
+			if hi <= seg_lo or seg_hi <= lo:
+				continue
+			if lo <= seg_lo and seg_hi <= hi:
+				top = merge_top(top, segment.top, self.k)
+				continue
+			mid = (seg_lo + seg_hi) // 2
+			stack.append((segment.left, seg_lo, mid))
+			stack.append((segment.right, mid, seg_hi))
+		return top
+
+
+class VersionedTree():
+	# These are the defined properties as described above
+	tree: Tree
+	current: Snapshot
+	lock: threading.Lock
+
+	def __init__(self, root: Node) -> None:
+		"""
+		The constructor for the VersionedTree class.
+		:param root: The root node of the Tree.
+		"""
+		self.tree = Tree(root)
+		self.lock = threading.Lock()
+		self.current = None
+		self.publish_layout()
+
+	def snapshot(self) -> Snapshot:
+		"""
+		Returns the latest published version. The result never changes.
+		:return: The snapshot.
+		"""
+		return self.current
+
+	def publish_layout(self) -> None:
+		"""
+		Lays the tree out in Euler-tour order and publishes a freshly built version. Costs O(n k).
+		"""
+		start = {}
+		end = {}
+		golds = []
+		stack = [(self.tree.root, False)]
+		while stack:
+			node, done = stack.pop()
+			if done:
+				end[node] = len(golds)
+				continue
+			start[node] = len(golds)
+			golds.append(node.gold)
+			stack.append((node, True))
+			for child in reversed(node.children):
+				stack.append((child, False))
+		k = self.tree.root.k
+		version = 0 if self.current is None else self.current.version + 1
+		self.current = Snapshot(version, k, start, end, len(golds), _build(golds, 0, len(golds), k))
+
+	def update_gold(self, node: Node, gold: int) -> None:
+		"""
+		Updates the gold of the node and publishes a new version by path copying. Costs O(k log n).
+		:param node: The node to update.
+		:param gold: The new gold of the node.
+		"""
+		with self.lock:
+			node.update_gold(gold)
+			old = self.current
+			segments = _assign(old.segments, 0, old.size, old.start[node], gold, old.k)
+			self.current = Snapshot(old.version + 1, old.k, old.start, old.end, old.size, segments)
+
+	def put(self, node_a: Node, node_b: Node) -> None:
+		"""
+		Adds node_b as the last child of node_a and publishes a new version.
+		:param node_a: The node to add the child to.
+		:param node_b: The child to add to the node.
+		"""
+		with self.lock:
+			self.tree.put(node_a, node_b)
+			self.publish_layout()
+
+	def move_subtree(self, node_a: Node, node_b: Node) -> None:
+		"""
+		Makes the subtree rooted at node_a the last child of node_b and publishes a new version.
+		:param node_a: The root of the subtree to move.
+		:param node_b: The node to add the subtree to.
+		"""
+		with self.lock:
+			self.tree.move_subtree(node_a, node_b)
+			self.publish_layout()
+
+	def melt_subtree(self, node_a: Node) -> None:
+		"""
+		Melts the subtree rooted at node_a into it and publishes a new version.
+		:param node_a: The root of the subtree to melt.
+		"""
+		with self.lock:
+			self.tree.melt_subtree(node_a)
+			self.publish_layout()
@@ -0,0 +1,275 @@
+"""
+Benchmark
+----------
+
+Reproducible benchmark harness for the Tree k_sum data structure.
+
+For every combination of tree shape, size n and k it builds a mine, records the build
+time, builds it again under tracemalloc to record peak memory, then times each
+operation separately and a mixed workload:
+	- put: adds a new leaf under a random node
+	- update_gold: changes the gold of a random node
+	- k_sum: reads the k_sum of a random node after a random gold update
+	- move_subtree: moves a random subtree under a random node outside it
+	- melt_subtree: melts a random node
+	- mixed: 40% update_gold, 20% k_sum, 20% put, 15% move_subtree, 5% melt_subtree
+
+Only the operation itself is timed; picking valid arguments is not. Every timed
+operation except k_sum is followed by reading the root's k_sum, so deferred work is
+counted. Shapes:
+	- random: each node hangs under a uniformly random earlier node
+	- path: a single chain, the "dig straight until gold" mine
+	- star: every node hangs under the root
+	- bushy: a complete 4-ary tree
+
+Run from this directory, e.g.
+
+	python benchmark.py --sizes 1000 10000 --ks 1 10 --json bench.json
+	python benchmark.py --shapes path --sizes 1000000 --ops mixed
+
+Results are printed as a table and optionally written as JSON so that runs can be
+compared across changes.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from Node import Node
+from Tree import Tree
+from EulerTree import EulerTree
+
+SHAPES = ["random", "path", "star", "bushy"]
+OPERATIONS = ["put", "update_gold", "k_sum", "move_subtree", "melt_subtree", "mixed"]
+BACKENDS = ["tree", "euler"]
+
+
+def generate_parents(shape: str, n: int, rng: random.Random) -> list[int]:
+	"""
+	Returns the parent index of every node of a tree of the given shape. The root is node 0.
+	:param shape: One of SHAPES.
+	:param n: The number of nodes.
+	:param rng: The random generator to use.
+	:return: The parent index of each node, -1 for the root.
+	"""
+	if shape == "random":
+		return [-1] + [rng.randrange(i) for i in range(1, n)]
+	if shape == "path":
+		return [-1] + [i - 1 for i in range(1, n)]
+	if shape == "star":
+		return [-1] + [0] * (n - 1)
+	if shape == "bushy":
+		return [-1] + [(i - 1) // 4 for i in range(1, n)]
+	raise ValueError("Unknown shape: {}".format(shape))
+
+
+class Workload():
+	"""
+	A mine built for one benchmark run, with the helpers used to pick valid operations.
+	"""
+
+	def __init__(self, backend: str, shape: str, n: int, k: int, seed: int) -> None:
+		self.rng = random.Random(seed)
+		self.k = k
+		parents = generate_parents(shape, n, self.rng)
+		self.nodes = [Node(self.rng.randint(0, 10 ** 6), k) for _ in range(n)]
+		self.tree = EulerTree(self.nodes[0]) if backend == "euler" else Tree(self.nodes[0])
+		self.parents = parents
+
+	def build(self) -> None:
+		"""
+		Links every node under its parent. The pointer backend uses a batch.
+		"""
+		if isinstance(self.tree, EulerTree):
+			for i in range(1, len(self.nodes)):
+				self.tree.put(self.nodes[self.parents[i]], self.nodes[i])
+		else:
+			with self.tree.batch():
+				for i in range(1, len(self.nodes)):
+					self.tree.put(self.nodes[self.parents[i]], self.nodes[i])
+
+	def k_sum(self, node: Node) -> int:
+		if isinstance(self.tree, EulerTree):
+			return self.tree.k_sum(node)
+		return node.return_k_sum()
+
+	def update_gold(self, node: Node, gold: int) -> None:
+		self.tree.update_gold(node, gold)
+
+	def random_node(self) -> Node:
+		"""
+		Returns a random node that is still part of the tree.
+		"""
+		while True:
+			node = self.nodes[self.rng.randrange(len(self.nodes))]
+			if node.parent is not None or node is self.tree.root:
+				return node
+
+	def random_move(self) -> tuple[Node, Node]:
+		"""
+		Returns a random (node_a, node_b) pair where node_b is outside the subtree of node_a,
+		or None if no pair was found.
+		"""
+		for _ in range(20):
+			node_a = self.random_node()
+			node_b = self.random_node()
+			if node_a is self.tree.root:
+				continue
+			ancestor = node_b
+			while ancestor is not None and ancestor is not node_a:
+				ancestor = ancestor.parent
+			if ancestor is None:
+				return node_a, node_b
+		return None
+
+	def run(self, operation: str, count: int) -> list[float]:
+		"""
+		Runs the operation count times and returns the latency of each run in seconds.
+		:param operation: One of OPERATIONS.
+		:param count: The number of operations to run.
+		:return: The latencies.
+		"""
+		latencies = []
+		root = self.tree.root
+		for _ in range(count):
+			name = operation
+			if operation == "mixed":
+				roll = self.rng.random()
+				name = "update_gold" if roll < 0.4 else "k_sum" if roll < 0.6 else "put" if roll < 0.8 \
+					else "move_subtree" if roll < 0.95 else "melt_subtree"
+
+			if name == "put":
+				node_a = self.random_node()
+				node_b = Node(self.rng.randint(0, 10 ** 6), self.k)
+				self.nodes.append(node_b)
+				start = time.perf_counter()
+				self.tree.put(node_a, node_b)
+				self.k_sum(root)
+			elif name == "update_gold":
+				node = self.random_node()
+				gold = self.rng.randint(0, 10 ** 6)
+				start = time.perf_counter()
+				self.update_gold(node, gold)
+				self.k_sum(root)
+			elif name == "k_sum":
+				self.update_gold(self.random_node(), self.rng.randint(0, 10 ** 6))
+				node = self.random_node()
+				start = time.perf_counter()
+				self.k_sum(node)
+			elif name == "move_subtree":
+				pair = self.random_move()
+				if pair is None:
+					continue
+				start = time.perf_counter()
+				self.tree.move_subtree(*pair)
+				self.k_sum(root)
+			elif name == "melt_subtree":
+				node = self.random_node()
+				start = time.perf_counter()
+				self.tree.melt_subtree(node)
+				self.k_sum(root)
+			latencies.append(time.perf_counter() - start)
+		return latencies
+
+
+def summarise(latencies: list[float]) -> dict:
+	"""
+	Returns the count, total time, throughput and latency percentiles of a run.
+	"""
+	ordered = sorted(latencies)
+	total = sum(ordered)
+
+	def percentile(p):
+		return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+	return {
+		"count": len(ordered),
+		"seconds": total,
+		"ops_per_sec": len(ordered) / total if total > 0 else None,
+		"p50_us": percentile(0.5) * 1e6,
+		"p99_us": percentile(0.99) * 1e6,
+		"max_us": (ordered[-1] if ordered else 0.0) * 1e6,
+	}
+
+
+def bench(backend: str, shape: str, n: int, k: int, operations: list[str], count: int, seed: int) -> dict:
+	"""
+	Runs one benchmark configuration.
+	:return: The configuration and its measurements.
+	"""
+	workload = Workload(backend, shape, n, k, seed)
+	start = time.perf_counter()
+	workload.build()
+	workload.k_sum(workload.tree.root)
+	build_seconds = time.perf_counter() - start
+
+	# tracemalloc slows every allocation down, so peak memory gets its own build.
+	del workload
+	tracemalloc.start()
+	workload = Workload(backend, shape, n, k, seed)
+	workload.build()
+	workload.k_sum(workload.tree.root)
+	peak_bytes = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+
+	result = {
+		"backend": backend,
+		"shape": shape,
+		"n": n,
+		"k": k,
+		"seed": seed,
+		"build_seconds": build_seconds,
+		"build_peak_bytes": peak_bytes,
+		"operations": {},
+	}
+	for operation in operations:
+		# Every operation starts from a freshly built mine so runs are independent.
+		workload = Workload(backend, shape, n, k, seed)
+		workload.build()
+		workload.k_sum(workload.tree.root)
+		result["operations"][operation] = summarise(workload.run(operation, count))
+	return result
+
+
+def print_result(result: dict) -> None:
+	print("{backend} {shape} n={n} k={k}: build {build_seconds:.3f}s, peak {mb:.1f} MB".format(
+		mb=result["build_peak_bytes"] / 2 ** 20, **result))
+	for operation, stats in result["operations"].items():
+		ops_per_sec = stats["ops_per_sec"]
+		print("    {:<14}{:>12} ops/s  p50 {:>10.1f}us  p99 {:>10.1f}us".format(
+			operation, "-" if ops_per_sec is None else "{:.0f}".format(ops_per_sec), stats["p50_us"], stats["p99_us"]))
+
+
+def main(argv: list[str] = None) -> list[dict]:
+	parser = argparse.ArgumentParser(description="Benchmark the Tree k_sum data structure.")
+	parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["tree"])
+	parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=SHAPES)
+	parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+	parser.add_argument("--ks", nargs="+", type=int, default=[1, 10])
+	parser.add_argument("--ops", nargs="+", choices=OPERATIONS, default=OPERATIONS)
+	parser.add_argument("--count", type=int, default=1000, help="operations per measurement")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--json", help="write the results to this file")
+	args = parser.parse_args(argv)
+
+	results = []
+	for backend in args.backends:
+		for shape in args.shapes:
+			for n in args.sizes:
+				for k in args.ks:
+					result = bench(backend, shape, n, k, args.ops, args.count, args.seed)
+					print_result(result)
+					results.append(result)
+
+	if args.json:
+		with open(args.json, "w") as f:
+			json.dump({"python": platform.python_version(), "argv": sys.argv[1:], "results": results}, f, indent=2)
+	return results
+
+
+if __name__ == '__main__':
+	main()
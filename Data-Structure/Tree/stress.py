@@ -0,0 +1,285 @@
+"""
+Stress
+----------
+
+Differential correctness oracle for the Tree backends.
+
+ReferenceTree is a deliberately simple implementation of the specification: it keeps
+plain parent/children links and computes every k_sum by sorting the whole subtree.
+The stress runner generates long random sequences of put, update_gold, move_subtree
+and melt_subtree operations, applies each one to the reference and to a backend under
+test, and after every step checks that every node in the tree has the same k_sum.
+
+A failing sequence is shrunk by removing chunks of operations while it still fails.
+Operations that become invalid after a removal (a node that no longer exists, a move
+into its own subtree) are skipped on replay. The latency of every operation applied
+to the backend is recorded in power-of-two microsecond buckets.
+
+Operations are tuples that refer to nodes by integer id, the root being 0:
+	- ("put", parent_id, new_id, gold)
+	- ("update_gold", node_id, gold)
+	- ("move_subtree", node_a_id, node_b_id)
+	- ("melt_subtree", node_id)
+
+Run from this directory, e.g.
+
+	python stress.py --backends tree euler --seeds 50 --steps 500
+"""
+
+import argparse
+import random
+import time
+
+from Node import Node
+from Tree import Tree
+from EulerTree import EulerTree
+
+# The implementations under test, selectable by name
+BACKENDS = {"tree": Tree, "euler": EulerTree}
+
+
+class ReferenceTree():
+	"""
+	Brute-force reference implementation of the mine.
+	"""
+
+	def __init__(self, gold: int, k: int) -> None:
+		self.k = k
+		self.gold = {0: gold}
+		self.parent = {0: None}
+		self.children = {0: []}
+
+	def subtree(self, node: int) -> list[int]:
+		"""
+		Returns every id in the subtree of the node.
+		"""
+		nodes = [node]
+		for current in nodes:
+			nodes += self.children[current]
+		return nodes
+
+	def k_sum(self, node: int) -> int:
+		return sum(sorted((self.gold[i] for i in self.subtree(node)), reverse=True)[:self.k])
+
+	def is_valid(self, op: tuple) -> bool:
+		"""
+		Returns True if the operation can be applied to the current tree.
+		"""
+		name = op[0]
+		if name == "put":
+			return op[1] in self.gold and op[2] not in self.gold
+		if name == "update_gold" or name == "melt_subtree":
+			return op[1] in self.gold
+		if name == "move_subtree":
+			node_a, node_b = op[1], op[2]
+			if node_a not in self.gold or node_b not in self.gold or node_a == 0:
+				return False
+			while node_b is not None:
+				if node_b == node_a:
+					return False
+				node_b = self.parent[node_b]
+			return True
+		return False
+
+	def apply(self, op: tuple) -> None:
+		name = op[0]
+		if name == "put":
+			_, parent, node, gold = op
+			self.gold[node] = gold
+			self.parent[node] = parent
+			self.children[node] = []
+			self.children[parent].append(node)
+		elif name == "update_gold":
+			self.gold[op[1]] = op[2]
+		elif name == "move_subtree":
+			_, node_a, node_b = op
+			self.children[self.parent[node_a]].remove(node_a)
+			self.children[node_b].append(node_a)
+			self.parent[node_a] = node_b
+		elif name == "melt_subtree":
+			node = op[1]
+			melted = self.subtree(node)
+			self.gold[node] = sum(self.gold[i] for i in melted)
+			for i in melted[1:]:
+				del self.gold[i], self.parent[i], self.children[i]
+			self.children[node] = []
+
+
+class Backend():
+	"""
+	Applies operations by id to one of the optimised Tree implementations.
+	"""
+
+	def __init__(self, kind: str, gold: int, k: int) -> None:
+		self.k = k
+		self.nodes = {0: Node(gold, k)}
+		self.tree = BACKENDS[kind](self.nodes[0])
+
+	def k_sum(self, node: int) -> int:
+		if isinstance(self.tree, EulerTree):
+			return self.tree.k_sum(self.nodes[node])
+		return self.nodes[node].return_k_sum()
+
+	def apply(self, op: tuple) -> None:
+		name = op[0]
+		if name == "put":
+			_, parent, node, gold = op
+			self.nodes[node] = Node(gold, self.k)
+			self.tree.put(self.nodes[parent], self.nodes[node])
+		elif name == "update_gold":
+			self.tree.update_gold(self.nodes[op[1]], op[2])
+		elif name == "move_subtree":
+			self.tree.move_subtree(self.nodes[op[1]], self.nodes[op[2]])
+		elif name == "melt_subtree":
+			self.tree.melt_subtree(self.nodes[op[1]])
+
+
+def generate_ops(rng: random.Random, steps: int, max_gold: int = 100) -> list[tuple]:
+	"""
+	Generates a random valid sequence of operations, tracking the tree with a ReferenceTree.
+	:param rng: The random generator to use.
+	:param steps: The number of operations.
+	:param max_gold: Gold values are drawn from 0..max_gold.
+	:return: The operations.
+	"""
+	reference = ReferenceTree(0, 1)
+	ops = []
+	next_id = 1
+	while len(ops) < steps:
+		alive = list(reference.gold)
+		roll = rng.random()
+		if roll < 0.4 or len(alive) < 3:
+			op = ("put", rng.choice(alive), next_id, rng.randint(0, max_gold))
+			next_id += 1
+		elif roll < 0.7:
+			op = ("update_gold", rng.choice(alive), rng.randint(0, max_gold))
+		elif roll < 0.93:
+			op = ("move_subtree", rng.choice(alive), rng.choice(alive))
+		else:
+			op = ("melt_subtree", rng.choice(alive))
+		if reference.is_valid(op):
+			reference.apply(op)
+			ops.append(op)
+	return ops
+
+
+def record_latency(histograms: dict, name: str, seconds: float) -> None:
+	"""
+	Adds a latency to the power-of-two microsecond histogram of the operation.
+	"""
+	bucket = 1
+	while bucket < seconds * 1e6:
+		bucket *= 2
+	counts = histograms.setdefault(name, {})
+	counts[bucket] = counts.get(bucket, 0) + 1
+
+
+def run_ops(kind: str, ops: list[tuple], k: int, root_gold: int, histograms: dict = None) -> tuple:
+	"""
+	Applies the operations to the reference and the backend, comparing every node after each step.
+	:param kind: The backend under test, a key of BACKENDS.
+	:param ops: The operations to apply. Invalid ones are skipped.
+	:param k: Value used to calculate k_sum.
+	:param root_gold: The gold of the root.
+	:param histograms: If given, latencies of the backend operations are recorded into it.
+	:return: None if every step matched, otherwise (step, node_id, expected, got).
+	"""
+	reference = ReferenceTree(root_gold, k)
+	backend = Backend(kind, root_gold, k)
+	for step, op in enumerate(ops):
+		if not reference.is_valid(op):
+			continue
+		reference.apply(op)
+		start = time.perf_counter()
+		backend.apply(op)
+		if histograms is not None:
+			record_latency(histograms, op[0], time.perf_counter() - start)
+		for node in reference.subtree(0):
+			expected = reference.k_sum(node)
+			start = time.perf_counter()
+			got = backend.k_sum(node)
+			if histograms is not None:
+				record_latency(histograms, "k_sum", time.perf_counter() - start)
+			if expected != got:
+				return step, node, expected, got
+	return None
+
+
+def shrink(kind: str, ops: list[tuple], k: int, root_gold: int) -> list[tuple]:
+	"""
+	Removes chunks of operations, halving the chunk size down to single operations,
+	as long as the remaining sequence still fails.
+	:return: A smaller failing sequence.
+	"""
+	chunk = max(1, len(ops) // 2)
+	while True:
+		i = 0
+		while i < len(ops):
+			candidate = ops[:i] + ops[i + chunk:]
+			if run_ops(kind, candidate, k, root_gold) is not None:
+				ops = candidate
+			else:
+				i += chunk
+		if chunk == 1:
+			return ops
+		chunk //= 2
+
+
+def stress(kind: str, seeds: int, steps: int, ks: list[int], histograms: dict = None) -> list[dict]:
+	"""
+	Runs random sequences against the backend and returns the shrunk failures.
+	:param kind: The backend under test, a key of BACKENDS.
+	:param seeds: The number of random sequences per k.
+	:param steps: The number of operations per sequence.
+	:param ks: The values of k to test.
+	:param histograms: If given, latencies of the backend operations are recorded into it.
+	:return: One dict per failing sequence.
+	"""
+	failures = []
+	for k in ks:
+		for seed in range(seeds):
+			rng = random.Random(seed)
+			root_gold = rng.randint(0, 100)
+			ops = generate_ops(rng, steps)
+			mismatch = run_ops(kind, ops, k, root_gold, histograms)
+			if mismatch is not None:
+				ops = shrink(kind, ops, k, root_gold)
+				failures.append({
+					"backend": kind,
+					"k": k,
+					"seed": seed,
+					"root_gold": root_gold,
+					"ops": ops,
+					"mismatch": run_ops(kind, ops, k, root_gold),
+				})
+	return failures
+
+
+def main(argv: list[str] = None) -> int:
+	parser = argparse.ArgumentParser(description="Differential stress test of the Tree backends.")
+	parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+	parser.add_argument("--seeds", type=int, default=20)
+	parser.add_argument("--steps", type=int, default=300)
+	parser.add_argument("--ks", nargs="+", type=int, default=[1, 3, 10])
+	args = parser.parse_args(argv)
+
+	status = 0
+	for kind in args.backends:
+		histograms = {}
+		failures = stress(kind, args.seeds, args.steps, args.ks, histograms)
+		print("{}: {} failing sequence(s)".format(kind, len(failures)))
+		for failure in failures:
+			status = 1
+			step, node, expected, got = failure["mismatch"]
+			print("  k={k} seed={seed} root_gold={root_gold}".format(**failure))
+			print("  node {} after step {}: expected {}, got {}".format(node, step, expected, got))
+			for op in failure["ops"]:
+				print("    {}".format(op))
+		for name, counts in sorted(histograms.items()):
+			buckets = "  ".join("<={}us:{}".format(bucket, counts[bucket]) for bucket in sorted(counts))
+			print("  {:<14}{}".format(name, buckets))
+	return status
+
+
+if __name__ == '__main__':
+	raise SystemExit(main())
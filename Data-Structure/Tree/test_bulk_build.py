@@ -0,0 +1,90 @@
+from Node import Node
+from Tree import Tree
+
+import BulkBuild
+import random
+import unittest
+
+
+def assert_equal(got, expected, msg):
+	"""
+	Simple assert helper
+	"""
+	assert expected == got, \
+		"[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class BulkBuildTestCases(unittest.TestCase):
+	"""
+	Testing Tree.from_edges
+	"""
+
+	def random_edges(self, n, seed):
+		"""
+		Edges of a random tree whose ids are strings, listed in random order
+		"""
+		rng = random.Random(seed)
+		edges = [(None, "n0", rng.randint(0, 100))]
+		edges += [("n{}".format(rng.randrange(i)), "n{}".format(i), rng.randint(0, 100)) for i in range(1, n)]
+		first, rest = edges[0], edges[1:]
+		rng.shuffle(rest)
+		return [first] + rest
+
+	def check_against_put(self, edges, k, workers):
+		"""
+		Builds the same tree with put and with from_edges and compares every node
+		"""
+		nodes = {}
+		for parent, child, gold in edges:
+			nodes[child] = Node(gold, k)
+		tree = Tree(nodes[edges[0][1]])
+		with tree.batch():
+			for parent, child, gold in edges:
+				if parent is not None:
+					tree.put(nodes[parent], nodes[child])
+
+		built, by_id = Tree.from_edges(edges, k, workers)
+		assert_equal(built.root, by_id[edges[0][1]], "the root is the root edge's child")
+		for node_id, node in nodes.items():
+			other = by_id[node_id]
+			assert_equal(other.k_sum, node.k_sum, "ksum of {}".format(node_id))
+			assert_equal(other.sub_sum, node.sub_sum, "subtree gold of {}".format(node_id))
+			assert_equal(other.subtree_gold is None, False, "summary of {} is restored".format(node_id))
+			assert_equal(other.summary().values(), node.summary().values(), "summary of {}".format(node_id))
+			assert_equal([child.gold for child in other.children], [child.gold for child in node.children], "children of {}".format(node_id))
+		return by_id
+
+	def test_sequential(self):
+		"""
+		Test the in-process build against put
+		"""
+		by_id = self.check_against_put(self.random_edges(500, 7), 3, 1)
+		by_id["n10"].update_gold(1000)
+		assert_equal(by_id["n0"].k_sum, sum(sorted(by_id["n0"].get_all_sub_nodes(), reverse=True)[:3]), "restored nodes stay updatable")
+
+	def test_process_pool(self):
+		"""
+		Test the parallel build against put
+		"""
+		threshold = BulkBuild.PARALLEL_THRESHOLD
+		BulkBuild.PARALLEL_THRESHOLD = 0
+		try:
+			self.check_against_put(self.random_edges(3000, 8), 4, 2)
+			self.check_against_put([(None, 0, 5)] + [(i - 1, i, i % 13) for i in range(1, 2000)], 2, 2)
+		finally:
+			BulkBuild.PARALLEL_THRESHOLD = threshold
+
+	def test_invalid_edges(self):
+		"""
+		Test that edge lists that are not a single tree are rejected
+		"""
+		with self.assertRaises(ValueError):
+			Tree.from_edges([(None, 0, 1), (None, 1, 1)], 1)
+		with self.assertRaises(ValueError):
+			Tree.from_edges([(None, 0, 1), (2, 1, 1)], 1)
+		with self.assertRaises(ValueError):
+			Tree.from_edges([(None, 0, 1), (2, 1, 1), (1, 2, 1)], 1)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,88 @@
+from Node import Node
+from Tree import Tree
+
+import os
+import sys
+import tempfile
+import unittest
+
+# Far deeper than the default recursion limit of 1000
+DEPTH = 100000
+
+
+def assert_equal(got, expected, msg):
+	"""
+	Simple assert helper
+	"""
+	assert expected == got, \
+		"[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class DeepTreeTestCases(unittest.TestCase):
+	"""
+	Testing that a "dig straight until gold" chain works without raising the recursion limit
+	"""
+
+	def setUp(self):
+		"""
+		Set up a chain of DEPTH nodes whose gold is i % 1000 at depth i
+		"""
+		self.nodes = [Node(0, 3)]
+		self.tree = Tree(self.nodes[0])
+		with self.tree.batch():
+			for i in range(1, DEPTH):
+				node = Node(i % 1000, 3)
+				self.tree.put(self.nodes[-1], node)
+				self.nodes.append(node)
+		self.total = sum(i % 1000 for i in range(DEPTH))
+
+	def test_recursion_limit_unchanged(self):
+		"""
+		Test that the chain is deeper than the recursion limit
+		"""
+		assert sys.getrecursionlimit() < DEPTH, "The recursion limit was raised"
+
+	def test_k_sum_and_collection(self):
+		"""
+		Test return_k_sum and get_all_sub_nodes on the whole chain
+		"""
+		root = self.nodes[0]
+		assert_equal(root.return_k_sum(), 999 * 3, "k_sum of the root")
+		assert_equal(root.sub_sum, self.total, "gold of the whole chain")
+		assert_equal(len(root.get_all_sub_nodes()), DEPTH, "every node is collected")
+		self.nodes[-1].update_gold(5000)
+		assert_equal(root.return_k_sum(), 5000 + 999 * 2, "k_sum after raising the deepest node")
+
+	def test_melt(self):
+		"""
+		Test melting the whole chain into its root
+		"""
+		root = self.nodes[0]
+		self.tree.melt_subtree(root)
+		assert_equal(root.gold, self.total, "the root holds all the gold")
+		assert_equal(root.children, [], "the chain is removed")
+		assert_equal(self.nodes[-1].parent, None, "the deepest node is released")
+		assert_equal(root.return_k_sum(), self.total, "k_sum of the melted root")
+
+	def test_save_load(self):
+		"""
+		Test that the chain survives a snapshot and stays updatable
+		"""
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "chain.bin")
+			self.tree.save(path)
+			tree = Tree.load(path)
+		node = tree.root
+		depth = 1
+		while node.children:
+			node, = node.children
+			depth += 1
+		assert_equal(depth, DEPTH, "depth of the loaded chain")
+		assert_equal(tree.root.k_sum, 999 * 3, "k_sum of the loaded root")
+		node.update_gold(0)
+		tree.put(node, Node(2000, 3))
+		assert_equal(tree.root.k_sum, 2000 + 999 * 2, "k_sum after updating the deepest nodes")
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,129 @@
+from Node import Node
+from EulerTree import EulerTree, merge_top
+
+import random
+import unittest
+
+
+def assert_equal(got, expected, msg):
+	"""
+	Simple assert helper
+	"""
+	assert expected == got, \
+		"[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class EulerTreeTestCases(unittest.TestCase):
+	"""
+	Testing functionality of the EulerTree class
+	"""
+
+	def setUp(self):
+		"""
+		Set up the tree to be used throughout the test
+		This is the tree given in the sample
+			 A(5)
+		  /   |   \\
+		B(2) C(3) D(5)
+		/
+		E(9)
+		"""
+		k = 2
+		self.A = Node(5, k)
+		self.B = Node(2, k)
+		self.C = Node(3, k)
+		self.D = Node(5, k)
+		self.E = Node(9, k)
+		self.tree = EulerTree(self.A)
+		self.tree.put(self.B, self.E)
+		self.tree.put(self.A, self.B)
+		self.tree.put(self.A, self.C)
+		self.tree.put(self.A, self.D)
+
+	def test_merge_top(self):
+		"""
+		Test that merge_top keeps the k highest values of two sorted lists
+		"""
+		assert_equal(merge_top([9, 5, 1], [7, 6], 3), [9, 7, 6], "merge of two lists")
+		assert_equal(merge_top([4], [], 3), [4], "merge with an empty list")
+		assert_equal(merge_top([4, 3], [2], 5), [4, 3, 2], "merge shorter than k")
+
+	def test_k_sum(self):
+		"""
+		Test that the index answers k_sum for the sample tree
+		"""
+		nodes = [self.A, self.B, self.C, self.D, self.E]
+		ksum = [14, 11, 3, 5, 9]
+		for i in range(len(nodes)):
+			assert_equal(self.tree.k_sum(nodes[i]), ksum[i], "ksum values "+str(i))
+
+	def test_update_move_melt(self):
+		"""
+		Test that the index follows gold updates and structural changes
+		"""
+		self.tree.update_gold(self.C, 20)
+		assert_equal(self.tree.k_sum(self.A), 29, "A has a ksum of 29")
+		self.tree.move_subtree(self.B, self.C)
+		assert_equal(self.tree.k_sum(self.C), 29, "C has a ksum of 29")
+		assert_equal(self.tree.k_sum(self.D), 5, "D has a ksum of 5")
+		self.tree.melt_subtree(self.C)
+		assert_equal(self.tree.k_sum(self.C), 31, "C has a ksum of 31")
+		assert_equal(self.tree.k_sum(self.A), 36, "A has a ksum of 36")
+		self.tree.move_subtree(self.D, self.C)
+		assert_equal(self.tree.k_sum(self.C), 36, "C has a ksum of 36")
+		assert_equal(self.tree.k_sum(self.D), 5, "D has a ksum of 5")
+		assert_equal(len(self.tree.enter), 3, "melted nodes are no longer indexed")
+
+	def test_apply_ops_and_batch(self):
+		"""
+		Test that gold updates in apply_ops and in a batch reach the index
+		"""
+		F = Node(4, 2)
+		self.tree.apply_ops([
+			("update_gold", self.E, 100),
+			("put", self.C, F),
+			("update_gold", self.D, 1),
+		])
+		assert_equal([self.tree.k_sum(u) for u in [self.A, self.B, self.C, self.D]], [105, 102, 7, 1], "ksums after apply_ops")
+		assert_equal(self.tree.k_sum(self.A), self.A.k_sum, "index and nodes agree")
+
+		with self.tree.batch():
+			self.tree.update_gold(self.B, 50)
+			self.tree.update_gold(self.E, 0)
+		assert_equal([self.tree.k_sum(u) for u in [self.A, self.B]], [55, 50], "ksums after the batch")
+		assert_equal(self.tree.k_sum(self.A), self.A.k_sum, "index and nodes agree after the batch")
+
+	def test_random_matches_pointer_tree(self):
+		"""
+		Test that the index agrees with the pointer-based Nodes on random updates and moves
+		"""
+		rng = random.Random(4)
+		k = 3
+		nodes = [Node(rng.randint(0, 100), k)]
+		tree = EulerTree(nodes[0])
+		for _ in range(80):
+			node = Node(rng.randint(0, 100), k)
+			tree.put(rng.choice(nodes), node)
+			nodes.append(node)
+		for step in range(200):
+			node = rng.choice(nodes)
+			tree.update_gold(node, rng.randint(0, 100))
+			node_a, node_b = rng.sample(nodes[1:], 2)
+			if not self.is_descendant(node_b, node_a):
+				tree.move_subtree(node_a, node_b)
+			node = rng.choice(nodes)
+			assert_equal(tree.k_sum(node), node.return_k_sum(), "ksum at step "+str(step))
+
+	def is_descendant(self, node, ancestor):
+		"""
+		Returns True if node is in the subtree of ancestor
+		"""
+		while node is not None:
+			if node is ancestor:
+				return True
+			node = node.parent
+		return False
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -84,5 +84,38 @@ class SampleNodeTestCases(unittest.TestCase):
 			assert_equal(u.k, 1, "k values "+str(i))
 			assert_equal(u.return_k_sum(), ksum[i], "ksum values "+str(i))
 
+	def test_mutations_are_lazy(self):
+		"""
+		Test that adding children only marks the root paths dirty and reading k_sum cleans them
+		"""
+		self.A.return_k_sum()
+		self.E.add_child(Node(1, 1))
+		self.C.add_child(Node(4, 1))
+		assert_equal([u.dirty for u in [self.A, self.B, self.C, self.D, self.E]],
+			[True, True, True, False, True], "root paths of E and C are dirty")
+		assert_equal(self.B.return_k_sum(), 9, "ksum of B")
+		assert_equal([u.dirty for u in [self.A, self.B, self.C, self.D, self.E]],
+			[True, False, True, False, False], "B's subtree is clean")
+		assert_equal(self.A.return_k_sum(), 9, "ksum of A")
+		assert_equal(self.A.dirty or self.C.dirty, False, "A's subtree is clean")
+
+	def test_update_gold_in_place(self):
+		"""
+		Test that gold updates on a clean tree are applied to the ancestors without marking them dirty
+		"""
+		self.A.return_k_sum()
+		self.C.update_gold(7)
+		assert_equal([u.k_sum for u in [self.A, self.C]], [9, 7], "ksums after raising C")
+		self.D.update_gold(11)
+		assert_equal(self.A.k_sum, 11, "A's ksum follows D")
+		assert_equal(self.A.sub_sum, 34, "A has 34 gold in its subtree (5+2+7+11+9)")
+		self.D.update_gold(4)
+		assert_equal(self.A.k_sum, 9, "A's ksum after lowering D")
+		self.C.update_gold(1)
+		assert_equal(self.A.sub_sum, 21, "A has 21 gold in its subtree (5+2+1+4+9)")
+		assert_equal([u.dirty for u in [self.A, self.B, self.C, self.D, self.E]],
+			[False, False, False, False, False], "nothing is dirty")
+		assert_equal([u.k_sum for u in [self.A, self.B, self.C, self.D, self.E]], [9, 9, 1, 4, 9], "ksum values")
+
 if __name__ == '__main__':
 	unittest.main()
\ No newline at end of file
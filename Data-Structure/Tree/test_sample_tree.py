@@ -1,6 +1,8 @@
 from Node import Node
 from Tree import Tree
 
+import os
+import tempfile
 import unittest
 
 
@@ -136,6 +138,89 @@ class SampleTreeTestCases(unittest.TestCase):
 		assert_equal(self.B.return_k_sum(), 11, "B has a ksum of 11")
 		assert_equal(self.C.return_k_sum(), 3, "C has a ksum of 3")
 		assert_equal(self.D.return_k_sum(), 5, "D has a ksum of 5")
+
+	def test_update_deep_ancestors(self):
+		"""
+		Test that a gold update deep in the tree reaches every ancestor
+		"""
+		F = Node(1, 1)
+		self.tree.put(self.E, F)
+		F.update_gold(20)
+		assert_equal(self.E.k_sum, 20, "E has a ksum of 20")
+		assert_equal(self.B.k_sum, 20, "B has a ksum of 20")
+		assert_equal(self.A.k_sum, 20, "A has a ksum of 20")
+
+		self.tree.move_subtree(self.E, self.C)
+		assert_equal(self.B.k_sum, 2, "B has a ksum of 2")
+		assert_equal(self.C.k_sum, 20, "C has a ksum of 20")
+		assert_equal(self.A.k_sum, 20, "A has a ksum of 20")
+
+	def test_melt_releases_subtree(self):
+		"""
+		Test that melting detaches the melted nodes and keeps the gold totals
+		"""
+		F = Node(4, 1)
+		self.tree.put(self.E, F)
+		assert_equal(self.A.sub_sum, 28, "A has 28 gold in its subtree")
+		self.tree.melt_subtree(self.B)
+		assert_equal(self.B.gold, 15, "B has 15 gold (2+9+4)")
+		assert_equal(self.E.parent, None, "E is detached")
+		assert_equal(F.parent, None, "F is detached")
+		assert_equal(self.E.is_external(), True, "E has no children")
+		assert_equal(self.A.return_k_sum(), 15, "A has a ksum of 15")
+		assert_equal(self.A.sub_sum, 28, "A still has 28 gold in its subtree")
+
+	def test_apply_ops(self):
+		"""
+		Test that a batch of operations gives the same k_sums as applying them one at a time
+		"""
+		F = Node(12, 1)
+		G = Node(7, 1)
+		self.tree.apply_ops([
+			("put", self.C, F),
+			("put", F, G),
+			("update_gold", self.E, 1),
+			("move_subtree", self.B, self.D),
+			("update_gold", F, 0),
+			("melt_subtree", self.C),
+		])
+		assert_equal(self.A.dirty, False, "A is clean after the batch")
+		assert_equal(self.C.gold, 10, "C has 10 gold (3+0+7)")
+		assert_equal(G.parent, None, "G is melted")
+		assert_equal(self.A.return_k_sum(), 10, "A has a ksum of 10")
+		assert_equal(self.B.return_k_sum(), 2, "B has a ksum of 2")
+		assert_equal(self.D.return_k_sum(), 5, "D has a ksum of 5")
+
+		with self.tree.batch():
+			self.E.update_gold(30)
+			assert_equal(self.A.dirty, False, "a gold update on a clean tree is applied at once")
+			self.tree.put(self.D, Node(3, 1))
+			assert_equal(self.A.dirty, True, "A is dirty inside the batch")
+		assert_equal(self.A.dirty, False, "A is clean after the batch")
+		assert_equal(self.A.return_k_sum(), 30, "A has a ksum of 30")
+
+	def test_save_load(self):
+		"""
+		Test that a snapshot restores the structure and k_sums and stays updatable
+		"""
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "mine.bin")
+			self.tree.save(path)
+			tree = Tree.load(path)
+
+		A = tree.root
+		B, C, D = A.get_children()
+		E, = B.get_children()
+		assert_equal([u.gold for u in [A, B, C, D, E]], [5, 2, 3, 5, 9], "gold values")
+		assert_equal([u.k_sum for u in [A, B, C, D, E]], [9, 9, 3, 5, 9], "ksum values")
+		assert_equal(A.sub_sum, 24, "A has 24 gold in its subtree")
+		assert_equal([u.summary().values() for u in [A, B, C, D, E]], [[9], [9], [3], [5], [9]], "summaries are restored from the snapshot")
+
+		E.update_gold(1)
+		tree.put(C, Node(4, 1))
+		assert_equal([u.k_sum for u in [A, B, C, D, E]], [5, 2, 4, 5, 1], "ksum values after updates")
+		tree.melt_subtree(A)
+		assert_equal(A.gold, 20, "A has 20 gold (5+2+3+5+1+4)")
 		
 if __name__ == '__main__':
 	unittest.main()
\ No newline at end of file
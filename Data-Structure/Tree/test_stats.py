@@ -0,0 +1,79 @@
+from Node import Node
+from Tree import Tree
+from Stats import STATS, bucket
+
+import unittest
+
+
+def assert_equal(got, expected, msg):
+	"""
+	Simple assert helper
+	"""
+	assert expected == got, \
+		"[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class StatsTestCases(unittest.TestCase):
+	"""
+	Testing the optional instrumentation of Node and Tree
+	"""
+
+	def tearDown(self):
+		STATS.disable()
+		STATS.reset()
+		STATS.hooks.clear()
+
+	def test_bucket(self):
+		"""
+		Test that values are bucketed into the smallest power of two at least as large
+		"""
+		assert_equal(bucket(0), 1, "bucket of 0")
+		assert_equal(bucket(1), 1, "bucket of 1")
+		assert_equal(bucket(5), 8, "bucket of 5")
+		assert_equal(bucket(8), 8, "bucket of 8")
+
+	def test_disabled_records_nothing(self):
+		"""
+		Test that nothing is recorded while stats are disabled
+		"""
+		root = Node(1, 2)
+		tree = Tree(root)
+		tree.put(root, Node(2, 2))
+		root.return_k_sum()
+		assert_equal(Tree.stats(), {"counters": {}, "histograms": {}, "visited": 0}, "disabled stats")
+
+	def test_counters_and_hooks(self):
+		"""
+		Test that enabled stats count operations, histograms and visits, and call the hooks
+		"""
+		calls = []
+		Tree.add_hook(lambda operation, seconds, nodes: calls.append((operation, nodes)))
+		STATS.enable()
+
+		root = Node(1, 2)
+		tree = Tree(root)
+		node_a = Node(5, 2)
+		node_b = Node(3, 2)
+		tree.put(root, node_a)
+		tree.put(node_a, node_b)
+		node_b.update_gold(10)
+		assert_equal(root.return_k_sum(), 15, "k_sum after update")
+		tree.move_subtree(node_b, root)
+		tree.melt_subtree(root)
+
+		stats = Tree.stats()
+		counters = stats["counters"]
+		assert_equal(counters["put"], 2, "put count")
+		assert_equal(counters["update_gold"], 2, "update_gold count")
+		assert_equal(counters["move_subtree"], 1, "move_subtree count")
+		assert_equal(counters["melt_subtree"], 1, "melt_subtree count")
+		assert_equal(counters["recompute"], 2, "recompute count")
+		assert_equal(sum(stats["histograms"]["put.latency_us"].values()), 2, "put latency samples")
+		assert_equal(stats["histograms"]["remove_degree"], {1: 1}, "remove_degree")
+		assert stats["visited"] > 0, "No nodes visited were recorded"
+		assert_equal(len(calls), sum(counters.values()), "hook calls")
+		assert_equal(calls[2], ("update_gold", 1), "update_gold stops at node_a, already dirty from the puts")
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,60 @@
+from Tree import Tree
+
+import stress
+import unittest
+
+
+def assert_equal(got, expected, msg):
+	"""
+	Simple assert helper
+	"""
+	assert expected == got, \
+		"[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class StaleMoveTree(Tree):
+	"""
+	A broken backend that forgets to update the old parent when moving a subtree
+	"""
+
+	def move_subtree(self, node_a, node_b):
+		node_a.parent.children.remove(node_a)
+		node_b.add_child(node_a)
+
+
+class StressTestCases(unittest.TestCase):
+	"""
+	Testing the differential stress runner
+	"""
+
+	def setUp(self):
+		stress.BACKENDS["stale"] = StaleMoveTree
+
+	def tearDown(self):
+		del stress.BACKENDS["stale"]
+
+	def test_backends_match_reference(self):
+		"""
+		Test that both backends agree with the reference on random sequences
+		"""
+		for kind in ["tree", "euler"]:
+			histograms = {}
+			failures = stress.stress(kind, seeds=3, steps=150, ks=[1, 4], histograms=histograms)
+			assert_equal(failures, [], kind + " has no failing sequence")
+			assert_equal(sorted(histograms), ["k_sum", "melt_subtree", "move_subtree", "put", "update_gold"],
+				kind + " records latencies of every operation")
+
+	def test_shrinks_failing_sequence(self):
+		"""
+		Test that a broken backend is caught and its failing sequence is shrunk
+		"""
+		failures = stress.stress("stale", seeds=1, steps=200, ks=[1])
+		assert_equal(len(failures), 1, "the broken backend fails")
+		failure = failures[0]
+		assert_equal(failure["mismatch"] is not None, True, "the shrunk sequence still fails")
+		assert_equal(len(failure["ops"]) <= 4, True, "the sequence is shrunk to a few operations")
+		assert_equal(failure["ops"][-1][0], "move_subtree", "the last operation is a move")
+
+
+if __name__ == '__main__':
+	unittest.main()
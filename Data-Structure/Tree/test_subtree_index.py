@@ -0,0 +1,87 @@
+from Node import Node
+from Tree import Tree
+
+import random
+import unittest
+
+
+def assert_equal(got, expected, msg):
+	"""
+	Simple assert helper
+	"""
+	assert expected == got, \
+		"[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class SubtreeIndexTestCases(unittest.TestCase):
+	"""
+	Testing Tree.top_k_sum, backed by SubtreeIndex
+	"""
+
+	def test_sample_tree(self):
+		"""
+		Test top_k_sum for several k on the sample tree
+			 A(5)
+		  /   |   \\
+		B(2) C(3) D(5)
+		/
+		E(9)
+		"""
+		A, B, C, D, E = Node(5, 1), Node(2, 1), Node(3, 1), Node(5, 1), Node(9, 1)
+		tree = Tree(A)
+		tree.put(B, E)
+		tree.put(A, B)
+		tree.put(A, C)
+		tree.put(A, D)
+		assert_equal([tree.top_k_sum(A, k) for k in range(7)], [0, 9, 14, 19, 22, 24, 24], "top k of A")
+		assert_equal([tree.top_k_sum(B, k) for k in range(3)], [0, 9, 11], "top k of B")
+		assert_equal(A.k_sum, 9, "the construction-time k_sum still works")
+
+		E.update_gold(1)
+		assert_equal(tree.top_k_sum(A, 2), 10, "the index follows gold updates")
+
+	def test_index_belongs_to_its_tree(self):
+		"""
+		Test that mutating another tree keeps the index, and that updates that cancel out in the gold totals still rebuild it
+		"""
+		A, B, C = Node(10, 1), Node(1, 1), Node(2, 1)
+		tree = Tree(A)
+		tree.put(A, B)
+		tree.put(A, C)
+		X = Node(1, 1)
+		other = Tree(X)
+		other.put(X, Node(4, 1))
+		assert_equal(tree.top_k_sum(A, 3), 13, "top 3 of A")
+		index = tree.subtree_index
+
+		X.update_gold(7)
+		other.put(X, Node(8, 1))
+		assert_equal(tree.top_k_sum(A, 3), 13, "top 3 of A after mutating the other tree")
+		assert_equal(tree.subtree_index is index, True, "the index was kept")
+
+		B.update_gold(3)
+		C.update_gold(0)
+		assert_equal(A.sub_sum, 13, "the gold total is unchanged")
+		assert_equal(tree.top_k_sum(A, 2), 13, "top 2 of A after the updates")
+		assert_equal(tree.subtree_index is index, False, "the index was rebuilt")
+
+	def test_random_matches_brute_force(self):
+		"""
+		Test top_k_sum against sorting the subtree, with duplicate gold values
+		"""
+		rng = random.Random(5)
+		nodes = [Node(rng.randint(0, 20), 3)]
+		tree = Tree(nodes[0])
+		for _ in range(150):
+			node = Node(rng.randint(0, 20), 3)
+			tree.put(rng.choice(nodes), node)
+			nodes.append(node)
+		for _ in range(300):
+			node = rng.choice(nodes)
+			k = rng.randint(0, 40)
+			expected = sum(sorted(node.get_all_sub_nodes(), reverse=True)[:k])
+			assert_equal(tree.top_k_sum(node, k), expected, "top {} sum".format(k))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,119 @@
+from Node import Node
+from Tree import Tree
+from TopK import TopK
+
+import random
+import unittest
+
+
+def assert_equal(got, expected, msg):
+	"""
+	Simple assert helper
+	"""
+	assert expected == got, \
+		"[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+def brute_force_k_sum(node):
+	"""
+	The k_sum of a node computed by sorting every gold value of its subtree
+	"""
+	return sum(sorted(node.get_all_sub_nodes(), reverse=True)[:node.k])
+
+
+class TopKTestCases(unittest.TestCase):
+	"""
+	Testing functionality of the TopK class
+	"""
+
+	def test_push(self):
+		"""
+		Test that pushing keeps the k highest values and their sum
+		"""
+		rng = random.Random(1)
+		for k in [1, 2, 5, 10]:
+			values = [rng.randint(-50, 50) for _ in range(40)]
+			summary = TopK(k)
+			for value in values:
+				summary.push(value)
+			expected = sorted(values, reverse=True)[:k]
+			assert_equal(summary.values(), expected, "values with k={}".format(k))
+			assert_equal(summary.total, sum(expected), "total with k={}".format(k))
+
+	def test_merge_and_combine(self):
+		"""
+		Test that merged and combined summaries match the brute force top k
+		"""
+		rng = random.Random(2)
+		for k in [1, 3, 8]:
+			groups = [[rng.randint(0, 100) for _ in range(rng.randint(0, 12))] for _ in range(5)]
+			summaries = [TopK(k, group) for group in groups]
+			everything = [7] + [value for group in groups for value in group]
+			expected = sorted(everything, reverse=True)[:k]
+
+			combined = TopK.combine(k, 7, summaries)
+			assert_equal(combined.values(), expected, "combine with k={}".format(k))
+
+			merged = TopK(k, [7])
+			for summary in summaries:
+				merged.merge(summary)
+			assert_equal(merged.values(), expected, "merge with k={}".format(k))
+			assert_equal([TopK(k, group).values() for group in groups],
+				[summary.values() for summary in summaries], "inputs unchanged")
+
+	def test_replace(self):
+		"""
+		Test that raising one of the summarised values keeps the k highest values and their sum
+		"""
+		rng = random.Random(4)
+		for k in [1, 3, 6]:
+			values = [rng.randint(0, 20) for _ in range(15)]
+			summary = TopK(k, values)
+			for _ in range(30):
+				i = rng.randrange(len(values))
+				new = values[i] + rng.randint(0, 10)
+				summary.replace(values[i], new)
+				values[i] = new
+				expected = sorted(values, reverse=True)[:k]
+				assert_equal(summary.values(), expected, "values with k={}".format(k))
+				assert_equal(summary.total, sum(expected), "total with k={}".format(k))
+
+	def test_updates_on_clean_tree_match_brute_force(self):
+		"""
+		Test that gold updates applied in place between reads match sorting every subtree
+		"""
+		rng = random.Random(6)
+		for k in [1, 3, 50]:
+			nodes = [Node(rng.randint(0, 100), k)]
+			tree = Tree(nodes[0])
+			for _ in range(60):
+				node = Node(rng.randint(0, 100), k)
+				tree.put(rng.choice(nodes), node)
+				nodes.append(node)
+			for _ in range(100):
+				nodes[0].return_k_sum()
+				rng.choice(nodes).update_gold(rng.randint(0, 100))
+				node = rng.choice(nodes)
+				assert_equal(node.return_k_sum(), brute_force_k_sum(node), "ksum with k={}".format(k))
+				assert_equal(node.sub_sum, sum(node.get_all_sub_nodes()), "sub_sum with k={}".format(k))
+
+	def test_random_tree_matches_brute_force(self):
+		"""
+		Test that k_sum maintained through TopK matches sorting every subtree
+		"""
+		rng = random.Random(3)
+		for k in [1, 2, 4, 50]:
+			nodes = [Node(rng.randint(0, 100), k)]
+			tree = Tree(nodes[0])
+			for _ in range(60):
+				node = Node(rng.randint(0, 100), k)
+				tree.put(rng.choice(nodes), node)
+				nodes.append(node)
+			for _ in range(30):
+				rng.choice(nodes).update_gold(rng.randint(0, 100))
+			for i, node in enumerate(nodes):
+				assert_equal(node.return_k_sum(), brute_force_k_sum(node), "ksum of node {} with k={}".format(i, k))
+
+
+if __name__ == '__main__':
+	unittest.main()
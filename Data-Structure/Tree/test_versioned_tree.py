@@ -0,0 +1,96 @@
+from Node import Node
+from VersionedTree import VersionedTree
+
+import random
+import threading
+import unittest
+
+
+def assert_equal(got, expected, msg):
+	"""
+	Simple assert helper
+	"""
+	assert expected == got, \
+		"[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class VersionedTreeTestCases(unittest.TestCase):
+	"""
+	Testing functionality of the VersionedTree class
+	"""
+
+	def setUp(self):
+		"""
+		Set up the tree to be used throughout the test
+		This is the tree given in the sample
+			 A(5)
+		  /   |   \\
+		B(2) C(3) D(5)
+		/
+		E(9)
+		"""
+		k = 2
+		self.A = Node(5, k)
+		self.B = Node(2, k)
+		self.C = Node(3, k)
+		self.D = Node(5, k)
+		self.E = Node(9, k)
+		self.B.add_child(self.E)
+		self.A.add_child(self.B)
+		self.A.add_child(self.C)
+		self.A.add_child(self.D)
+		self.tree = VersionedTree(self.A)
+
+	def test_snapshots_are_isolated(self):
+		"""
+		Test that a snapshot keeps answering for its own version after later writes
+		"""
+		before = self.tree.snapshot()
+		self.tree.update_gold(self.C, 20)
+		after_update = self.tree.snapshot()
+		self.tree.move_subtree(self.B, self.D)
+		after_move = self.tree.snapshot()
+
+		assert_equal([before.k_sum(u) for u in [self.A, self.B, self.C, self.D]], [14, 11, 3, 5], "first version")
+		assert_equal([after_update.k_sum(u) for u in [self.A, self.B, self.C, self.D]], [29, 11, 20, 5], "after update")
+		assert_equal([after_move.k_sum(u) for u in [self.A, self.B, self.C, self.D]], [29, 11, 20, 14], "after move")
+		assert_equal([before.version, after_update.version, after_move.version], [0, 1, 2], "versions")
+		assert_equal(after_update.segments.left is not before.segments.left or after_update.segments.right is not before.segments.right, True, "the update copied the path")
+
+	def test_concurrent_readers(self):
+		"""
+		Test that readers always see a consistent version while a writer updates gold
+		"""
+		rng = random.Random(6)
+		nodes = [self.A, self.B, self.C, self.D, self.E]
+		errors = []
+		done = threading.Event()
+
+		def read():
+			while not done.is_set():
+				snapshot = self.tree.snapshot()
+				# Every update below writes the same gold to both E and D, in two versions.
+				# A consistent snapshot of an odd version has them different, of an even one equal.
+				if snapshot.version % 2 == 0 and snapshot.k_sum(self.E) != snapshot.k_sum(self.D):
+					errors.append(snapshot.version)
+
+		self.tree.update_gold(self.E, 5)
+		self.tree.update_gold(self.D, 5)
+		readers = [threading.Thread(target=read) for _ in range(4)]
+		for reader in readers:
+			reader.start()
+		for _ in range(300):
+			gold = rng.randint(0, 100)
+			self.tree.update_gold(self.E, gold)
+			self.tree.update_gold(self.D, gold)
+		done.set()
+		for reader in readers:
+			reader.join()
+		assert_equal(errors, [], "no reader saw a torn version")
+		snapshot = self.tree.snapshot()
+		for u in nodes:
+			assert_equal(snapshot.k_sum(u), u.return_k_sum(), "final version matches the pointer tree")
+
+
+if __name__ == '__main__':
+	unittest.main()
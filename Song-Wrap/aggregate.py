@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import NamedTuple
+import numpy as np
+from store import HistoryStore, SONG, ARTIST, GENRE, DURATION, STREAMING_TIME
+
+
+class Summary(NamedTuple):
+    '''
+    Everything shown on the Wrapped Wall for one month
+
+    @Attributes:
+    - plays: number of plays in the month
+    - top_song, top_artist, top_genre: (name, streaming count) of the most streamed item
+    - favorite_songs, favorite_artists, favorite_genres: names streamed at least as often as the average item
+    - total_duration: total duration of the songs played, in seconds
+    - actual_streaming_time: total time actually streamed, in seconds
+    '''
+    plays: int
+    top_song: tuple
+    top_artist: tuple
+    top_genre: tuple
+    favorite_songs: set
+    favorite_artists: set
+    favorite_genres: set
+    total_duration: int
+    actual_streaming_time: int
+
+
+def top_and_favorites(codes: np.ndarray, names: list[str]) -> tuple[tuple, set]:
+    '''
+    Counts the codes of one column and returns its most frequent name and favorites.
+    Ties for the top go to the name streamed first in the month, like find_most_frequent.
+
+    @parameters
+    - codes (np.ndarray): the song, artist or genre code of every play, not empty
+    - names (list[str]): the name of each code
+
+    @returns
+    - tuple(tuple(str, int), set(str)): the top name with its count, and the favorite names
+    '''
+    counts = np.bincount(codes, minlength=len(names))
+    present = counts > 0
+    highest = counts.max()
+    tied = np.flatnonzero(counts == highest)
+    top = tied[0] if len(tied) == 1 else codes[np.argmax(np.isin(codes, tied))]
+
+    #favorites are compared to the average count among the items streamed this month
+    average = counts[present].mean()
+    favorites = {names[code] for code in np.flatnonzero(present & (counts >= average)).tolist()}
+    return (names[top], int(highest)), favorites
+
+
+def summarise(columns: np.ndarray, store: HistoryStore) -> Summary | None:
+    '''
+    Computes every Wrapped statistic of a month in one vectorised pass over its columns
+
+    @parameters
+    - columns (np.ndarray): the month's columns, as returned by HistoryStore.month
+    - store (HistoryStore): the store the columns come from, used to decode names
+
+    @returns
+    - Summary | None: the statistics, or None if there are no plays in the month
+    '''
+    if columns.shape[1] == 0:
+        return None
+    top_song, favorite_songs = top_and_favorites(columns[SONG], store.songs)
+    top_artist, favorite_artists = top_and_favorites(columns[ARTIST], store.artists)
+    top_genre, favorite_genres = top_and_favorites(columns[GENRE], store.genres)
+    return Summary(int(columns.shape[1]), top_song, top_artist, top_genre,
+                   favorite_songs, favorite_artists, favorite_genres,
+                   int(columns[DURATION].sum(dtype=np.int64)),
+                   int(columns[STREAMING_TIME].sum(dtype=np.int64)))
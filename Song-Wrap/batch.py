@@ -0,0 +1,129 @@
+'''
+Batch Wrapped generation: every month of every user in user_info/, without prompts.
+
+Each history file is parsed once (through its HistoryStore cache), after which every
+month is a slice of its columns. Users are spread across a process pool.
+
+Run from this folder, e.g.
+    python batch.py --format csv --output wrapped.csv
+'''
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from store import HistoryStore
+from aggregate import Summary, summarise
+
+#columns of the CSV output, favorites are joined with ";"
+FIELDS = ["username", "year", "month", "plays",
+          "top_song", "top_song_streams", "top_artist", "top_artist_streams", "top_genre", "top_genre_streams",
+          "favorite_songs", "favorite_artists", "favorite_genres",
+          "total_duration", "actual_streaming_time"]
+
+
+def user_files(folder: str) -> list[str]:
+    '''
+    Returns the history file of every user in the folder, sorted by username
+    '''
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".txt"))
+
+
+def to_record(username: str, year: int, month: int, summary: Summary) -> dict:
+    '''
+    Returns a month's summary as a flat record with the keys in FIELDS, favorites sorted
+    '''
+    return {
+        "username": username,
+        "year": year,
+        "month": month,
+        "plays": summary.plays,
+        "top_song": summary.top_song[0],
+        "top_song_streams": summary.top_song[1],
+        "top_artist": summary.top_artist[0],
+        "top_artist_streams": summary.top_artist[1],
+        "top_genre": summary.top_genre[0],
+        "top_genre_streams": summary.top_genre[1],
+        "favorite_songs": sorted(summary.favorite_songs),
+        "favorite_artists": sorted(summary.favorite_artists),
+        "favorite_genres": sorted(summary.favorite_genres),
+        "total_duration": summary.total_duration,
+        "actual_streaming_time": summary.actual_streaming_time,
+    }
+
+
+def summarise_user(filename: str) -> list[dict]:
+    '''
+    Computes the Wrapped summary of every month a user streamed in
+
+    @parameters
+    - filename (str): the user's history file
+
+    @returns
+    - list[dict]: one record per (year, month), oldest first, with the keys in FIELDS
+    '''
+    username = os.path.splitext(os.path.basename(filename))[0]
+    store = HistoryStore.open(filename)
+    records = []
+    for year, month in sorted(store.months):
+        summary = summarise(store.month(month, year), store)
+        records.append(to_record(username, year, month, summary))
+    return records
+
+
+def run(folder: str = "user_info", workers: int = None) -> list[dict]:
+    '''
+    Computes every monthly summary of every user in the folder
+
+    @parameters
+    - folder (str): the folder of user history files
+    - workers (int): number of worker processes, defaults to the number of CPUs; 1 runs in-process
+
+    @returns
+    - list[dict]: the records of every user, ordered by username then month
+    '''
+    files = user_files(folder)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(files) < 2:
+        results = map(summarise_user, files)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            results = list(pool.map(summarise_user, files))
+    return [record for records in results for record in records]
+
+
+def write_csv(records: list[dict], out) -> None:
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+    for record in records:
+        row = dict(record)
+        for key in ("favorite_songs", "favorite_artists", "favorite_genres"):
+            row[key] = ";".join(row[key])
+        writer.writerow(row)
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate the Wrapped summary of every month of every user.")
+    parser.add_argument("--folder", default="user_info", help="folder of user history files")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--output", help="file to write, defaults to standard output")
+    parser.add_argument("--workers", type=int, help="number of worker processes, defaults to the number of CPUs")
+    args = parser.parse_args(argv)
+
+    records = run(args.folder, args.workers)
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(records, out, indent=2)
+            out.write("\n")
+        else:
+            write_csv(records, out)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
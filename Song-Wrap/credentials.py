@@ -0,0 +1,285 @@
+'''
+Credential store for Song-Wrap logins.
+
+Passwords are kept as salted PBKDF2-SHA256 hashes in one file per user folder,
+user_info/credentials.csv, one "username,iterations,salt,hash" line per user (salt and hash in hex).
+The file is loaded once into a dictionary and only reloaded when its modification time
+changes, which is checked at most once per RELOAD_INTERVAL seconds, so a burst of logins
+does no disk I/O per attempt. Successful logins are remembered as an HMAC of the password
+under a random per-process key, so repeated logins of the same user skip PBKDF2 until their
+stored hash changes. A user without an entry is added from the password line of their
+history file the first time they log in, so only that one password is hashed. Usernames
+without a history file are remembered too, so repeated attempts do not open a file each;
+they are forgotten whenever the modification time is checked again.
+
+Run from this folder to add every user from their history file at once,
+or to set one user's password, e.g.
+    python credentials.py --migrate
+    python credentials.py --set akali
+'''
+from __future__ import annotations
+import argparse
+import getpass
+import hashlib
+import hmac
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+#PBKDF2 rounds for new hashes, each stored hash keeps its own count
+ITERATIONS = 100_000
+#seconds between checks of the credential file's modification time
+RELOAD_INTERVAL = 1.0
+#most successful logins remembered at once
+VERIFIED_LIMIT = 10_000
+#most unknown usernames remembered at once
+UNKNOWN_LIMIT = 10_000
+
+
+def credentials_path(folder: str) -> str:
+    return os.path.join(folder, "credentials.csv")
+
+
+def hash_password(password: str, salt: bytes, iterations: int = ITERATIONS) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+def read_entries(path: str) -> tuple[dict, int]:
+    '''
+    Reads a credential file
+
+    @returns
+    - tuple(dict, int): username -> (iterations, salt, hash), and the file's modification time
+    '''
+    entries = {}
+    with open(path, "r") as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        for line in f:
+            if line.strip():
+                username, iterations, salt, digest = line.strip().split(",")
+                entries[username] = (int(iterations), bytes.fromhex(salt), bytes.fromhex(digest))
+    return entries, mtime_ns
+
+
+def history_entry(filename: str) -> tuple[int, bytes, bytes] | None:
+    '''
+    Hashes the password on the first line of a user's history file
+
+    @returns
+    - tuple | None: the new (iterations, salt, hash) entry, or None if there is no such file
+    '''
+    try:
+        with open(filename, "r") as f:
+            password = f.readline().strip()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    salt = secrets.token_bytes(16)
+    return ITERATIONS, salt, hash_password(password, salt)
+
+
+class CredentialStore:
+    '''
+    In-memory copy of a credential file, reloaded when the file changes.
+
+    @Attributes:
+    - path: the credential file
+    - entries: username -> (iterations, salt, hash)
+    - mtime_ns: modification time of the file when it was loaded, None if it does not exist
+    - checked: time.monotonic() of the last modification time check
+    - verified: username -> (stored entry, keyed HMAC of the password) of recent successful logins
+    - unknown: usernames with neither an entry nor a history file since the last check of the file
+    - lock: held while the file is re-read, merged and written
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self.mtime_ns = None
+        self.checked = None
+        self.verified = {}
+        self.unknown = set()
+        self.key = secrets.token_bytes(32)
+        self.lock = threading.Lock()
+
+    def refresh(self) -> None:
+        '''
+        Reloads the file if it changed, checking at most once per RELOAD_INTERVAL.
+        Unknown usernames are forgotten at every check, so new history files are noticed.
+        '''
+        now = time.monotonic()
+        if self.checked is not None and now - self.checked < RELOAD_INTERVAL:
+            return
+        self.checked = now
+        self.unknown.clear()
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self.entries, self.mtime_ns = {}, None
+            return
+        if mtime_ns != self.mtime_ns:
+            self.load()
+
+    def load(self) -> None:
+        self.entries, self.mtime_ns = read_entries(self.path)
+        self.checked = time.monotonic()
+        self.unknown.clear()
+
+    def save(self, updates: dict) -> None:
+        '''
+        Adds or replaces entries and writes the credential file, replacing it atomically.
+        The file is read again first, so entries saved meanwhile by other processes are kept.
+
+        @parameters
+        - updates (dict): username -> (iterations, salt, hash) of the entries to write
+        '''
+        with self.lock:
+            try:
+                entries = read_entries(self.path)[0]
+            except FileNotFoundError:
+                entries = {}
+            entries.update(updates)
+            #a unique temporary file, so concurrent writers never share one
+            with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(self.path) or ".",
+                                             prefix=".credentials.", suffix=".tmp", delete=False) as f:
+                for username, (iterations, salt, digest) in sorted(entries.items()):
+                    f.write("{},{},{},{}\n".format(username, iterations, salt.hex(), digest.hex()))
+            try:
+                os.replace(f.name, self.path)
+            except OSError:
+                os.remove(f.name)
+                raise
+            self.entries = entries
+            self.mtime_ns = os.stat(self.path).st_mtime_ns
+            self.checked = time.monotonic()
+            self.unknown.clear()
+
+    def migrate_user(self, username: str) -> tuple[int, bytes, bytes] | None:
+        '''
+        Adds a user without an entry from the password line of their history file,
+        which sits next to the credential file
+
+        @returns
+        - tuple | None: the new entry, or None if the user has no history file
+        '''
+        #only plain names, so a username can not point outside the folder
+        if not username or username.startswith(".") or os.path.basename(username) != username:
+            return None
+        entry = history_entry(os.path.join(os.path.dirname(self.path), username + ".txt"))
+        if entry is not None:
+            self.save({username: entry})
+        return entry
+
+    def verify(self, username: str, password: str) -> bool | None:
+        '''
+        Checks a password against its stored hash in constant time
+
+        @parameters
+        - username (str): the user
+        - password (str): the password to check
+
+        @returns
+        - bool | None: whether the password matches, or None if there is no such user
+        '''
+        self.refresh()
+        entry = self.entries.get(username)
+        if entry is None:
+            if username in self.unknown:
+                return None
+            #a user added after the credential file was created
+            entry = self.migrate_user(username)
+            if entry is None:
+                if len(self.unknown) >= UNKNOWN_LIMIT:
+                    self.unknown.clear()
+                self.unknown.add(username)
+                return None
+        #a login already verified against this exact entry skips the slow hash
+        fast = hmac.new(self.key, password.encode(), "sha256").digest()
+        remembered = self.verified.get(username)
+        if remembered is not None and remembered[0] is entry and hmac.compare_digest(remembered[1], fast):
+            return True
+        iterations, salt, digest = entry
+        if not hmac.compare_digest(hash_password(password, salt, iterations), digest):
+            return False
+        if len(self.verified) >= VERIFIED_LIMIT:
+            self.verified.clear()
+        self.verified[username] = (entry, fast)
+        return True
+
+    def set_password(self, username: str, password: str) -> None:
+        '''
+        Stores a new salted hash of the user's password and saves the file
+        '''
+        salt = secrets.token_bytes(16)
+        self.save({username: (ITERATIONS, salt, hash_password(password, salt))})
+
+
+#one store per credential file, shared by every login in the process
+STORES = {}
+#held while a store is created, so every login of a folder shares one store
+STORES_LOCK = threading.Lock()
+
+
+def credential_store(folder: str) -> CredentialStore:
+    '''
+    Returns the shared store of a user folder. Users are added to it as they log in.
+    '''
+    path = credentials_path(folder)
+    store = STORES.get(path)
+    if store is None:
+        with STORES_LOCK:
+            store = STORES.get(path)
+            if store is None:
+                store = STORES[path] = CredentialStore(path)
+    return store
+
+
+def migrate(folder: str, store: CredentialStore = None) -> int:
+    '''
+    Adds every user whose history file has no credential entry yet, hashing the password
+    on the first line of that file
+
+    @parameters
+    - folder (str): the folder of user history files
+    - store (CredentialStore): the store to add to, defaults to the folder's shared store
+
+    @returns
+    - int: the number of users added
+    '''
+    store = store or credential_store(folder)
+    store.checked = None
+    store.refresh()
+    try:
+        names = sorted(os.listdir(folder))
+    except FileNotFoundError:
+        return 0
+    added = {}
+    for name in names:
+        username, extension = os.path.splitext(name)
+        if extension != ".txt" or username in store.entries:
+            continue
+        entry = history_entry(os.path.join(folder, name))
+        if entry is not None:
+            added[username] = entry
+    if added:
+        store.save(added)
+    return len(added)
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the Song-Wrap credential store.")
+    parser.add_argument("--folder", default="user_info", help="folder of user history files")
+    parser.add_argument("--migrate", action="store_true", help="add every user from their history file's password line")
+    parser.add_argument("--set", metavar="USERNAME", help="set the password of a user")
+    args = parser.parse_args(argv)
+
+    if args.migrate:
+        print(f"Added {migrate(args.folder)} users to {credentials_path(args.folder)}")
+    if args.set:
+        credential_store(args.folder).set_password(args.set, getpass.getpass("New password: "))
+        print(f"Password of {args.set} updated")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+import datetime
+from typing import Iterable, Iterator, NamedTuple
+from parsing import parse_line
+
+#number of characters read from the history file at a time
+CHUNK_SIZE = 1 << 20
+
+
+class Play(NamedTuple):
+    '''
+    One line of a user's listening history.
+    A plain tuple, so millions of them cost no more than their fields.
+
+    @Attributes:
+    - name: The name of the song
+    - artist: The name of the song's artist
+    - genre: The genre of the song
+    - duration: The duration of the song in seconds
+    - streaming_time: How long the song was actually streamed, in seconds
+    - date: The day the song was streamed
+    '''
+    name: str
+    artist: str
+    genre: str
+    duration: int
+    streaming_time: int
+    date: datetime.date
+
+
+def month_range(month: int, year: int) -> tuple[datetime.date, datetime.date]:
+    '''
+    Returns the first day of the month and the first day of the next month
+
+    @parameters
+    - month (int): the month, 1 to 12
+    - year (int): the year
+
+    @returns
+    - tuple(date, date): the start (inclusive) and end (exclusive) of the month
+    '''
+    start = datetime.date(year, month, 1)
+    if month == 12:
+        return start, datetime.date(year + 1, 1, 1)
+    return start, datetime.date(year, month + 1, 1)
+
+
+def read_lines(filename: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    '''
+    Yields the history lines of a user file, skipping the password on the first line.
+    The file is read in chunks of chunk_size characters, so memory does not grow with the file.
+
+    @parameters
+    - filename (str): the user file
+    - chunk_size (int): the number of characters read at a time
+
+    @returns
+    - Iterator[str]: the non-empty lines without their line break
+    '''
+    with open(filename, "r") as f:
+        #skip the first line that contain password
+        f.readline()
+        rest = ""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines = (rest + chunk).split("\n")
+            #the last piece may be the start of a line that continues in the next chunk
+            rest = lines.pop()
+            for line in lines:
+                if line:
+                    yield line
+        if rest:
+            yield rest
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[Play]:
+    '''
+    Yields the play of every non-empty history line.
+    Durations and dates go through the shared token caches of parsing.py.
+
+    @parameters
+    - lines (Iterable[str]): history lines, without the password line
+
+    @returns
+    - Iterator[Play]: the plays in order
+    '''
+    for line in lines:
+        if line:
+            yield Play(*parse_line(line))
+
+
+def read_history(filename: str, start: datetime.date = None, end: datetime.date = None,
+                 chunk_size: int = CHUNK_SIZE) -> Iterator[Play]:
+    '''
+    Yields the plays of a user file, optionally only those streamed in [start, end).
+
+    @parameters
+    - filename (str): the user file
+    - start (date): if given, plays before this day are skipped
+    - end (date): if given, plays on or after this day are skipped
+    - chunk_size (int): the number of characters read at a time
+
+    @returns
+    - Iterator[Play]: the matching plays in file order
+    '''
+    for play in parse_lines(read_lines(filename, chunk_size)):
+        if (start is not None and play.date < start) or (end is not None and play.date >= end):
+            continue
+        yield play
@@ -0,0 +1,182 @@
+from __future__ import annotations
+import json
+import os
+from history import CHUNK_SIZE, Play, parse_lines
+from aggregate import Summary
+
+#bytes before the checkpoint kept to detect a history file that was rewritten rather than appended to
+TAIL_SIZE = 64
+
+
+def aggregates_path(filename: str) -> str:
+    '''
+    Returns the path of the aggregate store of a user file,
+    e.g. user_info/.cache/akali.months.json for user_info/akali.txt
+    '''
+    folder, name = os.path.split(filename)
+    return os.path.join(folder, ".cache", os.path.splitext(name)[0] + ".months.json")
+
+
+def new_month() -> dict:
+    return {"plays": 0, "songs": {}, "artists": {}, "genres": {}, "total_duration": 0, "actual_streaming_time": 0}
+
+
+class MonthlyAggregates:
+    '''
+    Persistent monthly streaming counts of one user, kept up to date as the history file grows.
+
+    History files are append-only, so the store remembers the byte offset it has read up to.
+    update() only parses the bytes appended since then, and a month's summary is a dictionary
+    lookup. If the file shrank or the bytes before the offset changed, everything is recounted.
+    A last line without a line break is counted but kept after the offset, because it may
+    still be being written; it is taken back out and read again by the next update.
+
+    Counts are kept in first-streamed order, so ties are broken exactly like count_streams
+    followed by find_most_frequent.
+
+    @Attributes:
+    - filename: the user's history file
+    - offset: number of bytes of the file already counted
+    - tail: the last bytes before offset, as latin-1 text
+    - pending: the counted last line after offset that has no line break yet
+    - months: (year, month) -> plays, song/artist/genre counts, total duration and streaming time
+    '''
+
+    def __init__(self, filename: str, offset: int = 0, tail: str = "", pending: str = "", months: dict = None):
+        self.filename = filename
+        self.offset = offset
+        self.tail = tail
+        self.pending = pending
+        self.months = {} if months is None else months
+
+    @classmethod
+    def open(cls, filename: str) -> MonthlyAggregates:
+        '''
+        Loads the aggregate store of a user file and counts anything appended since it was saved
+
+        @parameters
+        - filename (str): the user file
+
+        @returns
+        - MonthlyAggregates: the up-to-date store
+        '''
+        try:
+            with open(aggregates_path(filename), "r") as f:
+                saved = json.load(f)
+            months = {tuple(int(part) for part in key.split("-")): month for key, month in saved["months"].items()}
+            aggregates = cls(filename, saved["offset"], saved["tail"], saved["pending"], months)
+        except (OSError, ValueError, KeyError):
+            aggregates = cls(filename)
+        if aggregates.update():
+            aggregates.save()
+        return aggregates
+
+    def update(self) -> bool:
+        '''
+        Counts the plays appended to the history file since the last update
+
+        @returns
+        - bool: whether anything changed
+        '''
+        before = (self.offset, self.pending)
+        recounted = False
+        with open(self.filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(max(0, self.offset - len(self.tail)))
+            if size < self.offset or f.read(len(self.tail)).decode("latin-1") != self.tail:
+                self.offset, self.tail, self.pending, self.months = 0, "", "", {}
+                recounted = True
+            if self.pending:
+                for play in parse_lines([self.pending]):
+                    self.add(play, -1)
+                self.pending = ""
+            if self.offset == 0:
+                #skip the first line that contain password
+                f.seek(0)
+                f.readline()
+                self.offset = f.tell()
+            f.seek(self.offset)
+
+            rest = b""
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                lines = (rest + chunk).split(b"\n")
+                rest = lines.pop()
+                if not chunk:
+                    break
+                for play in parse_lines(line.decode() for line in lines):
+                    self.add(play)
+                self.offset += sum(len(line) + 1 for line in lines)
+
+            #a last line without a line break is counted, unless it is cut short mid-write
+            try:
+                plays = list(parse_lines([rest.decode()]))
+            except ValueError:
+                plays = []
+            if plays:
+                self.add(plays[0])
+                self.pending = rest.decode()
+
+            f.seek(max(0, self.offset - TAIL_SIZE))
+            self.tail = f.read(self.offset - f.tell()).decode("latin-1")
+        #a recount can end at the same offset with different counts
+        return recounted or (self.offset, self.pending) != before
+
+    def add(self, play: Play, times: int = 1) -> None:
+        '''
+        Adds a play to the counts of its month, or takes it back out if times is -1
+        '''
+        key = (play.date.year, play.date.month)
+        month = self.months.get(key)
+        if month is None:
+            month = self.months[key] = new_month()
+        month["plays"] += times
+        for counts, value in ((month["songs"], play.name), (month["artists"], play.artist), (month["genres"], play.genre)):
+            counts[value] = counts.get(value, 0) + times
+            if not counts[value]:
+                del counts[value]
+        month["total_duration"] += times*play.duration
+        month["actual_streaming_time"] += times*play.streaming_time
+        if not month["plays"]:
+            del self.months[key]
+
+    def save(self) -> None:
+        '''
+        Writes the store next to the history file, replacing the previous one atomically
+        '''
+        path = aggregates_path(self.filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        saved = {
+            "offset": self.offset,
+            "tail": self.tail,
+            "pending": self.pending,
+            "months": {"{:04d}-{:02d}".format(*key): month for key, month in self.months.items()},
+        }
+        with open(path + ".tmp", "w") as f:
+            json.dump(saved, f)
+        os.replace(path + ".tmp", path)
+
+    def summary(self, month: int, year: int) -> Summary | None:
+        '''
+        Returns the Wrapped statistics of a month
+
+        @parameters
+        - month (int): the month, 1 to 12
+        - year (int): the year
+
+        @returns
+        - Summary | None: the statistics, or None if there are no plays in the month
+        '''
+        counted = self.months.get((year, month))
+        if counted is None:
+            return None
+        tops = []
+        favorites = []
+        for key in ("songs", "artists", "genres"):
+            counts = counted[key]
+            highest = max(counts.values())
+            #the first item reaching the highest count, like find_most_frequent
+            tops.append(next((name, count) for name, count in counts.items() if count == highest))
+            average = sum(counts.values()) / len(counts)
+            favorites.append({name for name, count in counts.items() if count >= average})
+        return Summary(counted["plays"], *tops, *favorites, counted["total_duration"], counted["actual_streaming_time"])
@@ -0,0 +1,104 @@
+'''
+Shared parsing of history file tokens.
+
+History files repeat the same few track durations and days on thousands of lines, so
+"mm:ss" and "dd-mm-yyyy" tokens are converted through bounded LRU caches and each
+distinct token is only parsed once. parse_line splits a whole line once and converts
+its fields through those caches. cache_report() shows how often the caches were hit.
+
+Run from this folder to see the hit rates on real history files, e.g.
+    python parsing.py user_info/akali.txt user_info/karencat.txt
+'''
+from __future__ import annotations
+import datetime
+import sys
+import time
+from functools import lru_cache
+
+#distinct tokens kept by each cache
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_seconds(token: str) -> int:
+    '''
+    Converts an mm:ss token to seconds
+
+    @parameters
+    - token (str): the duration, e.g. '03:45'
+
+    @returns
+    - int: the duration in seconds
+    '''
+    minutes, seconds = token.strip().split(":")
+    return int(minutes)*60 + int(seconds)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(token: str) -> datetime.date:
+    '''
+    Converts a dd-mm-yyyy token to a date
+
+    @parameters
+    - token (str): the day, e.g. '23-02-2024'
+
+    @returns
+    - date: the day
+    '''
+    day, month, year = token.strip().split("-")
+    return datetime.date(int(year), int(month), int(day))
+
+
+def parse_line(line: str) -> tuple[str, str, str, int, int, datetime.date]:
+    '''
+    Parses one history line in a single split
+
+    @parameters
+    - line (str): name,artist,genre,mm:ss,mm:ss,dd-mm-yyyy
+
+    @returns
+    - tuple: the name, artist and genre, the duration and streaming time in seconds, and the day
+    '''
+    name, artist, genre, duration, streaming_time, day = line.split(",")
+    return name, artist, genre, parse_seconds(duration), parse_seconds(streaming_time), parse_date(day)
+
+
+def cache_report() -> dict:
+    '''
+    Returns the hits, misses, hit rate and size of each token cache
+    '''
+    report = {}
+    for name, cached in (("seconds", parse_seconds), ("date", parse_date)):
+        info = cached.cache_info()
+        lookups = info.hits + info.misses
+        report[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+            "size": info.currsize,
+        }
+    return report
+
+
+def clear_caches() -> None:
+    parse_seconds.cache_clear()
+    parse_date.cache_clear()
+
+
+def main(argv: list[str] = None) -> None:
+    from history import read_lines
+    for filename in (sys.argv[1:] if argv is None else argv):
+        clear_caches()
+        start = time.perf_counter()
+        lines = 0
+        for line in read_lines(filename):
+            parse_line(line)
+            lines += 1
+        elapsed = time.perf_counter() - start
+        print(f"{filename}: {lines} lines in {elapsed:.3f}s")
+        for name, info in cache_report().items():
+            print(f"  {name:<8}hit rate {info['hit_rate']:.1%}  ({info['hits']} hits, {info['misses']} misses, {info['size']} cached)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+'''
+Asynchronous Wrapped service.
+
+WrappedService answers many (username, password, month, year) requests concurrently on
+one asyncio event loop. Password checks and aggregation run in a bounded thread or process
+pool, so the loop never blocks on file I/O or parsing. Concurrent requests for the same
+user and month share one computation, and one user's aggregates are updated by one task
+at a time. Every request's latency is recorded for report().
+
+Run from this folder to load-test the service with its in-process client, e.g.
+    python service.py --requests 2000 --concurrency 64
+'''
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from aggregate import Summary
+from batch import to_record, user_files
+from incremental import MonthlyAggregates
+from wrapped import verify_password
+
+
+def compute_summary(filename: str, month: int, year: int) -> Summary | None:
+    '''
+    Pool entry point: brings the user's aggregates up to date and returns the month's summary
+    '''
+    return MonthlyAggregates.open(filename).summary(month, year)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    '''
+    Returns the value below which the given fraction of the sorted values fall
+    '''
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class WrappedService:
+    '''
+    Serves Wrapped summaries to concurrent asyncio callers.
+
+    @Attributes:
+    - folder: the folder of user history files
+    - executor: the bounded pool running password checks and aggregation
+    - in_flight: (username, month, year) -> the task computing that summary
+    - user_locks: username -> lock held while that user's aggregates are updated
+    - latencies: seconds taken by every finished request
+    - statuses: number of finished requests of each status
+    - coalesced: number of requests answered by another request's computation
+    '''
+
+    def __init__(self, folder: str = "user_info", workers: int = 4, processes: bool = False):
+        '''
+        @parameters
+        - folder (str): the folder of user history files
+        - workers (int): the size of the pool
+        - processes (bool): use a process pool instead of a thread pool
+        '''
+        self.folder = folder
+        self.executor: Executor = ProcessPoolExecutor(workers) if processes else ThreadPoolExecutor(workers)
+        self.in_flight = {}
+        self.user_locks = {}
+        self.reset_report()
+
+    def reset_report(self) -> None:
+        self.latencies = []
+        self.statuses = {}
+        self.coalesced = 0
+        self.started = None
+        self.finished = None
+
+    async def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> WrappedService:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def wrapped(self, username: str, password: str, month: int, year: int) -> dict:
+        '''
+        Answers one Wrapped request
+
+        @parameters
+        - username (str): the user
+        - password (str): the user's password
+        - month (int): the month, 1 to 12
+        - year (int): the year
+
+        @returns
+        - dict: {"status": "ok", ...the batch record fields...}, or {"status": "unknown user"},
+                {"status": "wrong password"} or {"status": "no plays"}
+        '''
+        start = time.perf_counter()
+        if self.started is None:
+            self.started = start
+        loop = asyncio.get_running_loop()
+        verified = await loop.run_in_executor(self.executor, verify_password, username, password, self.folder)
+        if verified is None:
+            response = {"status": "unknown user"}
+        elif not verified:
+            response = {"status": "wrong password"}
+        else:
+            summary = await self.summary(username, month, year)
+            if summary is None:
+                response = {"status": "no plays"}
+            else:
+                response = {"status": "ok", **to_record(username, year, month, summary)}
+        self.finished = time.perf_counter()
+        self.latencies.append(self.finished - start)
+        self.statuses[response["status"]] = self.statuses.get(response["status"], 0) + 1
+        return response
+
+    async def summary(self, username: str, month: int, year: int) -> Summary | None:
+        '''
+        Returns the month's summary, joining a computation already running for the same request
+        '''
+        key = (username, month, year)
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+        task = asyncio.ensure_future(self.compute(username, month, year))
+        self.in_flight[key] = task
+        task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def compute(self, username: str, month: int, year: int) -> Summary | None:
+        lock = self.user_locks.setdefault(username, asyncio.Lock())
+        filename = os.path.join(self.folder, username + ".txt")
+        async with lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, compute_summary, filename, month, year)
+
+    def report(self) -> dict:
+        '''
+        Returns the latency and throughput of the requests finished since the last reset_report()
+
+        @returns
+        - dict: request count, requests per second, latency percentiles in milliseconds,
+                the number of coalesced requests and the count of each status
+        '''
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {"requests": 0}
+        elapsed = self.finished - self.started
+        return {
+            "requests": len(latencies),
+            "throughput": len(latencies) / elapsed if elapsed > 0 else float("inf"),
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p90_ms": percentile(latencies, 0.9) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+            "coalesced": self.coalesced,
+            "statuses": dict(self.statuses),
+        }
+
+
+async def load_test(service: WrappedService, requests: list[tuple], concurrency: int) -> list[dict]:
+    '''
+    In-process client: sends the requests to the service with at most concurrency in flight
+
+    @parameters
+    - service (WrappedService): the service under test
+    - requests (list[tuple]): (username, password, month, year) tuples
+    - concurrency (int): the maximum number of requests waiting at once
+
+    @returns
+    - list[dict]: the responses, in request order
+    '''
+    gate = asyncio.Semaphore(concurrency)
+
+    async def send(request: tuple) -> dict:
+        async with gate:
+            return await service.wrapped(*request)
+
+    return await asyncio.gather(*(send(request) for request in requests))
+
+
+def random_requests(folder: str, count: int, seed: int = 0) -> list[tuple]:
+    '''
+    Builds requests for random users and months of 2024, reading each user's password from their file
+    '''
+    rng = random.Random(seed)
+    users = []
+    for filename in user_files(folder):
+        with open(filename, "r") as f:
+            users.append((os.path.splitext(os.path.basename(filename))[0], f.readline().strip()))
+    return [(*rng.choice(users), rng.randint(1, 12), 2024) for _ in range(count)]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    requests = random_requests(args.folder, args.requests, args.seed)
+    async with WrappedService(args.folder, args.workers, args.processes) as service:
+        await load_test(service, requests, args.concurrency)
+        return service.report()
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the Wrapped service with an in-process client.")
+    parser.add_argument("--folder", default="user_info", help="folder of user history files")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4, help="size of the thread or process pool")
+    parser.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if not report["requests"]:
+        print("0 requests finished")
+        return
+    print("{} requests, {:.0f} requests/s".format(report["requests"], report["throughput"]))
+    print("latency p50 {p50_ms:.2f}ms  p90 {p90_ms:.2f}ms  p99 {p99_ms:.2f}ms  max {max_ms:.2f}ms".format(**report))
+    print("coalesced {}  statuses {}".format(report["coalesced"], report["statuses"]))
+
+
+if __name__ == '__main__':
+    main()
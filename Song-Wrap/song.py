@@ -1,38 +1,21 @@
 from __future__ import annotations
-class Song:
-    def __init__(self, name: str, artist: str, genre: str, duration: str):
-        '''
-        Initialises a Song object given an artist name, a song genre, 
-        and song duration.
-
-        @Attributes:
-        - song_name: The name of the song
-        - artist: The name of the song's artist
-        - genre: The genre of the song
-        - duration: The duration of the song in seconds converted from mm:ss
-
-        @Parameters:
-        - name (str): The name of the song.
-        - artist (str): The name of the artist who performed or composed the song.
-        - genre (str): The genre of the song (e.g., pop, rock, classical).
-        - duration (str): The duration of the song in a string format, typically in 
-                        the form of 'minutes:seconds' (e.g., '03:45').
+import datetime
+import sys
+from parsing import parse_seconds
 
-        '''
-        self.song_name = name
-        self.artist = artist
-        self.genre = genre
-        #call set_duration func that set duration to integer
-        self.set_duration(duration)
+class Playable:
+    '''
+    The comparison and getter API shared by Song and Stream. It reads song_name, artist,
+    genre and duration from the subclass and has no slots of its own, so a subclass that
+    computes them pays for no unused storage.
+    '''
+    __slots__ = ()
 
     def __eq__(self, other):
-        if isinstance(other, Song):
+        if isinstance(other, Playable):
             return self.song_name == other.song_name and self.artist == other.artist
         return False
     
-    def __repr__(self):
-        return f"{self.song_name}, {self.artist}, {self.genre}"
-    
     def get_name(self) -> str:
         '''
         Returns the name of the song
@@ -53,25 +36,6 @@ class Song:
         return self.genre
 
     
-    def set_duration(self, duration: str) -> None:
-        '''
-        Converts the given song's duration to seconds
-        And sets the duration of the song.
-
-        @Parameters:
-        - duration (str): The duration of the song in string format mm:ss.
-
-        '''
-        #list that seperates mm and ss
-        duration = duration.strip().split(":")
-
-        #convert to seconds
-        duration = int(duration[0])*60 + int(duration[1])
-
-        #set duration of song object
-        self.duration = duration
-
-    
     def get_duration(self) -> int:
         '''
         Returns the duration of the song in seconds.
@@ -139,10 +103,55 @@ class Song:
         else:
             return None
 
+class Song(Playable):
+    __slots__ = ('song_name', 'artist', 'genre', 'duration')
+
+    def __init__(self, name: str, artist: str, genre: str, duration: str):
+        '''
+        Initialises a Song object given an artist name, a song genre, 
+        and song duration.
+
+        @Attributes:
+        - song_name: The name of the song
+        - artist: The name of the song's artist
+        - genre: The genre of the song
+        - duration: The duration of the song in seconds converted from mm:ss
+
+        @Parameters:
+        - name (str): The name of the song.
+        - artist (str): The name of the artist who performed or composed the song.
+        - genre (str): The genre of the song (e.g., pop, rock, classical).
+        - duration (str): The duration of the song in a string format, typically in 
+                        the form of 'minutes:seconds' (e.g., '03:45').
+
+        '''
+        self.song_name = name
+        self.artist = artist
+        self.genre = genre
+        #call set_duration func that set duration to integer
+        self.set_duration(duration)
+
+    def __repr__(self):
+        return f"{self.song_name}, {self.artist}, {self.genre}"
+    
+    def set_duration(self, duration: str) -> None:
+        '''
+        Converts the given song's duration to seconds
+        And sets the duration of the song.
+
+        @Parameters:
+        - duration (str): The duration of the song in string format mm:ss.
+
+        '''
+        #convert to seconds, each distinct mm:ss is parsed once and then cached
+        self.duration = parse_seconds(duration)
+
 class StreamingHistory(Song):
     '''
     Streaming Time History of Songs
     '''
+    __slots__ = ('_date', '_streaming_time', 'streaming_time')
+
     #class variable to store historical actual streaming time
     total_streaming_time = 0
 
@@ -165,14 +174,111 @@ class StreamingHistory(Song):
         - streaming_time (str): The streaming time of the song in string format mm:ss.
 
         '''
-        #list that seperates mm and ss
-        streaming_time = streaming_time.strip().split(":")
+        #convert to seconds, each distinct mm:ss is parsed once and then cached
+        self.streaming_time = parse_seconds(streaming_time)
+
+class Track(Song):
+    '''
+    An immutable, de-duplicated song. Every play of the same track shares one Track,
+    and its strings are interned so equal names are stored once.
+    '''
+    __slots__ = ()
+
+    def __init__(self, name: str, artist: str, genre: str, duration: int):
+        '''
+        @Parameters:
+        - name (str): The name of the song.
+        - artist (str): The name of the song's artist.
+        - genre (str): The genre of the song.
+        - duration (int): The duration of the song in seconds.
+        '''
+        object.__setattr__(self, "song_name", sys.intern(name))
+        object.__setattr__(self, "artist", sys.intern(artist))
+        object.__setattr__(self, "genre", sys.intern(genre))
+        object.__setattr__(self, "duration", duration)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Track is immutable")
+
+    def __hash__(self):
+        return hash((self.song_name, self.artist))
+
+class TrackTable:
+    '''
+    Symbol table giving every distinct track one shared Track object.
+
+    @Attributes:
+    - tracks: the Track of each track id
+    - ids: (name, artist, genre, duration) -> track id
+    '''
+    __slots__ = ('tracks', 'ids')
+
+    def __init__(self):
+        self.tracks = []
+        self.ids = {}
+
+    def track_id(self, name: str, artist: str, genre: str, duration: int) -> int:
+        '''
+        Returns the id of the track, adding it to the table the first time it is seen
+        '''
+        key = (name, artist, genre, duration)
+        track_id = self.ids.get(key)
+        if track_id is None:
+            track_id = self.ids[key] = len(self.tracks)
+            self.tracks.append(Track(name, artist, genre, duration))
+        return track_id
+
+class Stream(Playable):
+    '''
+    One play of a track: the shared Track, the day and the seconds actually streamed.
+    Immutable and slotted. It is a Playable whose name, artist, genre and duration are read
+    from its Track, so comparisons such as is_same and get_longest work like on StreamingHistory.
+
+    @Attributes:
+    - track: The shared Track that was played
+    - date: The day the track was played
+    - streaming_time: How long the track was actually streamed, in seconds
+    '''
+    __slots__ = ('track', 'date', 'streaming_time')
 
-        #convert to seconds
-        streaming_time = int(streaming_time[0])*60 + int(streaming_time[1])
+    def __init__(self, track: Track, date: datetime.date, streaming_time: int):
+        object.__setattr__(self, "track", track)
+        object.__setattr__(self, "date", date)
+        object.__setattr__(self, "streaming_time", streaming_time)
 
-        #set streaming_time of song object
-        self.streaming_time = streaming_time
+    def __setattr__(self, name, value):
+        raise AttributeError("Stream is immutable")
+
+    def __repr__(self):
+        return f"{self.track.song_name}, {self.track.artist}, Streamed in {self.streaming_time}s on {self.date}"
+
+    @property
+    def song_name(self) -> str:
+        return self.track.song_name
+
+    @property
+    def artist(self) -> str:
+        return self.track.artist
+
+    @property
+    def genre(self) -> str:
+        return self.track.genre
+
+    @property
+    def duration(self) -> int:
+        return self.track.duration
+
+    def get_name(self) -> str:
+        return self.track.song_name
+
+    def get_artist(self) -> str:
+        return self.track.artist
+
+    def get_genre(self) -> str:
+        return self.track.genre
+
+    def get_duration(self) -> int:
+        return self.track.duration
 
 if __name__ == '__main__':
     pass
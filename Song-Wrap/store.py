@@ -0,0 +1,138 @@
+from __future__ import annotations
+import json
+import os
+import numpy as np
+from history import read_history
+
+#rows of the column matrix saved in the cache
+SONG, ARTIST, GENRE, DAY, DURATION, STREAMING_TIME = range(6)
+
+
+def cache_paths(filename: str) -> tuple[str, str]:
+    '''
+    Returns the paths of the column and metadata files caching a user file,
+    e.g. user_info/.cache/akali.npy and user_info/.cache/akali.json for user_info/akali.txt
+    '''
+    folder, name = os.path.split(filename)
+    stem = os.path.join(folder, ".cache", os.path.splitext(name)[0])
+    return stem + ".npy", stem + ".json"
+
+
+class HistoryStore:
+    '''
+    Columnar, memory-mapped copy of a user's listening history.
+
+    The store is built from the text file the first time it is opened and saved next to it
+    in a .cache folder. It is rebuilt whenever the text file's modification time or size change.
+    Rows are grouped by month (keeping file order within a month), so every month is one
+    contiguous range of rows and a month query is a slice of the arrays.
+
+    @Attributes:
+    - columns: int32 array of shape (6, rows) holding, for every play, the song, artist and
+               genre codes, the day as a date ordinal, the duration and the streaming time in seconds
+    - songs: song name of each song code
+    - artists: artist name of each artist code
+    - genres: genre name of each genre code
+    - months: (year, month) -> (first row, last row + 1)
+    '''
+
+    def __init__(self, columns: np.ndarray, songs: list[str], artists: list[str], genres: list[str], months: dict):
+        self.columns = columns
+        self.songs = songs
+        self.artists = artists
+        self.genres = genres
+        self.months = months
+
+    @classmethod
+    def open(cls, filename: str) -> HistoryStore:
+        '''
+        Returns the store of a user file, building or rebuilding the cache if it is missing or stale.
+
+        @parameters
+        - filename (str): the user file
+
+        @returns
+        - HistoryStore: the store, its columns memory-mapped from the cache
+        '''
+        columns_path, meta_path = cache_paths(filename)
+        info = os.stat(filename)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta["mtime_ns"] == info.st_mtime_ns and meta["size"] == info.st_size:
+                return cls.from_meta(np.load(columns_path, mmap_mode="r"), meta)
+        except (OSError, ValueError, KeyError):
+            pass
+        store = cls.build(filename)
+        store.save(filename, info)
+        return store
+
+    @classmethod
+    def from_meta(cls, columns: np.ndarray, meta: dict) -> HistoryStore:
+        months = {(year, month): (lo, hi) for year, month, lo, hi in meta["months"]}
+        if columns.shape != (6, meta["rows"]):
+            raise ValueError("cache does not match its metadata")
+        return cls(columns, meta["songs"], meta["artists"], meta["genres"], months)
+
+    @classmethod
+    def build(cls, filename: str) -> HistoryStore:
+        '''
+        Parses a user file into dictionary-encoded columns grouped by month.
+        '''
+        codes = ({}, {}, {})
+        rows = [[] for _ in range(6)]
+        month_keys = []
+        for play in read_history(filename):
+            for column, value in enumerate((play.name, play.artist, play.genre)):
+                rows[column].append(codes[column].setdefault(value, len(codes[column])))
+            rows[DAY].append(play.date.toordinal())
+            rows[DURATION].append(play.duration)
+            rows[STREAMING_TIME].append(play.streaming_time)
+            month_keys.append(play.date.year*12 + play.date.month - 1)
+        columns = np.array(rows, dtype=np.int32).reshape(6, -1)
+
+        #stable sort by month so each month is contiguous and keeps its file order
+        month_keys = np.array(month_keys, dtype=np.int32)
+        order = np.argsort(month_keys, kind="stable")
+        columns = columns[:, order]
+        keys, starts, counts = np.unique(month_keys[order], return_index=True, return_counts=True)
+        months = {(int(key)//12, int(key)%12 + 1): (int(lo), int(lo + count))
+                  for key, lo, count in zip(keys, starts, counts)}
+        return cls(columns, *(list(code) for code in codes), months)
+
+    def save(self, filename: str, info: os.stat_result) -> None:
+        '''
+        Writes the cache of a user file. The metadata is written last, so a cache is
+        only used once both files are complete.
+        '''
+        columns_path, meta_path = cache_paths(filename)
+        os.makedirs(os.path.dirname(columns_path), exist_ok=True)
+        meta = {
+            "mtime_ns": info.st_mtime_ns,
+            "size": info.st_size,
+            "rows": int(self.columns.shape[1]),
+            "songs": self.songs,
+            "artists": self.artists,
+            "genres": self.genres,
+            "months": [[year, month, lo, hi] for (year, month), (lo, hi) in self.months.items()],
+        }
+        with open(columns_path + ".tmp", "wb") as f:
+            np.save(f, self.columns)
+        os.replace(columns_path + ".tmp", columns_path)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def month(self, month: int, year: int) -> np.ndarray:
+        '''
+        Returns the columns of the plays in the given month, a view of the memory-mapped arrays
+
+        @parameters
+        - month (int): the month, 1 to 12
+        - year (int): the year
+
+        @returns
+        - np.ndarray: int32 array of shape (6, plays in the month)
+        '''
+        lo, hi = self.months.get((year, month), (0, 0))
+        return self.columns[:, lo:hi]
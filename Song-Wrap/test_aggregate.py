@@ -0,0 +1,66 @@
+from aggregate import summarise
+from store import HistoryStore
+from wrapped import extract_song_details, count_streams, find_most_frequent, favorite_streams
+
+import os
+import shutil
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+USERS = ["akali", "karencat"]
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class SummariseTestCases(unittest.TestCase):
+    """
+    Testing the vectorised Wrapped Wall against the original per-song functions
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for user in USERS:
+            shutil.copy(os.path.join(HERE, user + ".txt"), self.folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_matches_per_song_functions(self):
+        """
+        Test that summarise gives the same tops, favorites and totals as count_streams,
+        find_most_frequent and favorite_streams for every month of the sample users
+        """
+        for user in USERS:
+            filename = os.path.join(self.folder, user + ".txt")
+            store = HistoryStore.open(filename)
+            for year, month in store.months:
+                label = "{} {}-{}".format(user, year, month)
+                summary = summarise(store.month(month, year), store)
+                songs = extract_song_details(filename, month, year)
+                assert_equal(summary.plays, len(songs), "plays of " + label)
+                for data_type, top, favorites in (("song", summary.top_song, summary.favorite_songs),
+                                                  ("artist", summary.top_artist, summary.favorite_artists),
+                                                  ("genre", summary.top_genre, summary.favorite_genres)):
+                    streaming_data = count_streams(songs, data_type)
+                    assert_equal(top, find_most_frequent(streaming_data), "top {} of {}".format(data_type, label))
+                    assert_equal(favorites, favorite_streams(streaming_data), "favorite {}s of {}".format(data_type, label))
+                assert_equal(summary.total_duration, sum(song.get_duration() for song in songs), "total duration of " + label)
+                assert_equal(summary.actual_streaming_time, sum(song.streaming_time for song in songs), "streaming time of " + label)
+
+    def test_empty_month(self):
+        """
+        Test that a month without plays has no summary
+        """
+        store = HistoryStore.open(os.path.join(self.folder, "akali.txt"))
+        assert_equal(summarise(store.month(1, 2024), store), None, "no plays in January")
+
+
+if __name__ == '__main__':
+    unittest.main()
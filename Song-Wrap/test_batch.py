@@ -0,0 +1,71 @@
+from batch import FIELDS, run, write_csv
+from incremental import MonthlyAggregates
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+USERS = ["akali", "karencat"]
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class BatchTestCases(unittest.TestCase):
+    """
+    Testing the batch summaries of every user and month
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for user in USERS:
+            shutil.copy(os.path.join(HERE, user + ".txt"), self.folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_every_user_and_month(self):
+        """
+        Test that run gives one record per user and month, ordered, matching the monthly aggregates
+        """
+        records = run(self.folder, workers=1)
+        assert_equal([(r["username"], r["year"], r["month"]) for r in records],
+                     [("akali", 2024, 2), ("akali", 2024, 3), ("karencat", 2024, 2), ("karencat", 2024, 3), ("karencat", 2024, 6)],
+                     "users and months")
+        for record in records:
+            summary = MonthlyAggregates.open(os.path.join(self.folder, record["username"] + ".txt")).summary(record["month"], record["year"])
+            assert_equal(record["plays"], summary.plays, "plays")
+            assert_equal((record["top_song"], record["top_song_streams"]), summary.top_song, "top song")
+            assert_equal(record["favorite_artists"], sorted(summary.favorite_artists), "favorite artists")
+            assert_equal(record["actual_streaming_time"], summary.actual_streaming_time, "streaming time")
+
+    def test_workers_agree(self):
+        """
+        Test that the process pool gives the same records as running in-process
+        """
+        assert_equal(run(self.folder, workers=2), run(self.folder, workers=1), "records")
+
+    def test_write_csv(self):
+        """
+        Test that the CSV has the FIELDS header and joins favorites with ;
+        """
+        records = run(self.folder, workers=1)
+        out = io.StringIO()
+        write_csv(records, out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert_equal(list(rows[0]), FIELDS, "header")
+        assert_equal(len(rows), len(records), "one row per record")
+        assert_equal(rows[0]["favorite_songs"], ";".join(records[0]["favorite_songs"]), "favorites joined")
+
+
+if __name__ == '__main__':
+    unittest.main()
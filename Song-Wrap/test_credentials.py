@@ -0,0 +1,115 @@
+from credentials import CredentialStore, credentials_path, migrate
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import credentials
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+USERS = ["akali", "karencat"]
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class CredentialStoreTestCases(unittest.TestCase):
+    """
+    Testing logins against the hashed credential store
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.passwords = {}
+        for user in USERS:
+            shutil.copy(os.path.join(HERE, user + ".txt"), self.folder)
+            with open(os.path.join(self.folder, user + ".txt"), "r") as f:
+                self.passwords[user] = f.readline().strip()
+        self.store = CredentialStore(credentials_path(self.folder))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_verify(self):
+        """
+        Test that verify accepts the right password, rejects a wrong one and knows no other users
+        """
+        assert_equal(self.store.verify("akali", self.passwords["akali"]), True, "right password")
+        assert_equal(self.store.verify("akali", self.passwords["akali"]), True, "right password, remembered")
+        assert_equal(self.store.verify("akali", self.passwords["karencat"]), False, "wrong password")
+        assert_equal(self.store.verify("nobody", "password"), None, "unknown user")
+        assert_equal(self.store.verify("../akali", self.passwords["akali"]), None, "path instead of a username")
+
+    def test_users_added_on_first_login(self):
+        """
+        Test that users are added one at a time as they log in, including users added after the file exists
+        """
+        assert_equal(os.path.exists(self.store.path), False, "no credential file before the first login")
+        self.store.verify("akali", self.passwords["akali"])
+        assert_equal(sorted(self.store.entries), ["akali"], "only the user who logged in was added")
+
+        with open(os.path.join(self.folder, "newbie.txt"), "w") as f:
+            f.write("secret\nEspresso,Sabrina Carpenter,Pop,04:22,04:22,23-02-2024")
+        assert_equal(self.store.verify("newbie", "secret"), True, "a user added later can log in")
+        with open(self.store.path, "r") as f:
+            assert_equal(sorted(line.split(",")[0] for line in f), ["akali", "newbie"], "both users were saved")
+
+    def test_reload_after_change(self):
+        """
+        Test that a password changed by another store is picked up once the file's modification time changes
+        """
+        assert_equal(self.store.verify("akali", self.passwords["akali"]), True, "right password")
+        other = CredentialStore(self.store.path)
+        other.set_password("akali", "changed")
+        assert_equal(sorted(other.entries), ["akali"], "the other store kept the saved user")
+
+        #make sure the modification time differs even on coarse clocks, then skip the reload interval
+        mtime_ns = os.stat(self.store.path).st_mtime_ns
+        os.utime(self.store.path, ns=(mtime_ns, mtime_ns + 10 ** 9))
+        self.store.checked = None
+        assert_equal(self.store.verify("akali", self.passwords["akali"]), False, "the old password is rejected")
+        assert_equal(self.store.verify("akali", "changed"), True, "the new password is accepted")
+
+    def test_unknown_users_remembered(self):
+        """
+        Test that an unknown username only looks for a history file once per check of the credential file
+        """
+        with mock.patch("credentials.history_entry", wraps=credentials.history_entry) as history_entry:
+            for _ in range(3):
+                assert_equal(self.store.verify("newbie", "secret"), None, "unknown user")
+            assert_equal(history_entry.call_count, 1, "history files looked for")
+
+            with open(os.path.join(self.folder, "newbie.txt"), "w") as f:
+                f.write("secret\nEspresso,Sabrina Carpenter,Pop,04:22,04:22,23-02-2024")
+            assert_equal(self.store.verify("newbie", "secret"), None, "still unknown until the next check")
+            self.store.checked = None
+            assert_equal(self.store.verify("newbie", "secret"), True, "found after the next check")
+            assert_equal(history_entry.call_count, 2, "history files looked for")
+
+    def test_missing_folder(self):
+        """
+        Test that a folder that does not exist has no users
+        """
+        folder = os.path.join(self.folder, "missing")
+        assert_equal(CredentialStore(credentials_path(folder)).verify("akali", self.passwords["akali"]), None, "no such user")
+        assert_equal(migrate(folder, CredentialStore(credentials_path(folder))), 0, "nothing to migrate")
+
+    def test_migrate(self):
+        """
+        Test that migrate adds every user without an entry and keeps existing ones
+        """
+        self.store.set_password("akali", "changed")
+        assert_equal(migrate(self.folder, self.store), 1, "only karencat was added")
+        assert_equal(self.store.verify("akali", "changed"), True, "akali kept the new password")
+        assert_equal(self.store.verify("karencat", self.passwords["karencat"]), True, "karencat was migrated")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+from history import Play, month_range, read_history, read_lines
+
+import datetime
+import os
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class HistoryTestCases(unittest.TestCase):
+    """
+    Testing the chunked history file reader
+    """
+
+    def test_read_lines(self):
+        """
+        Test that the password line is skipped and lines are whole whatever the chunk size
+        """
+        filename = os.path.join(HERE, "karencat.txt")
+        with open(filename, "r") as f:
+            expected = f.read().split("\n")[1:]
+        for chunk_size in [1, 7, 64, 1 << 20]:
+            assert_equal(list(read_lines(filename, chunk_size)), expected, "lines read {} characters at a time".format(chunk_size))
+
+    def test_read_history(self):
+        """
+        Test that every line becomes a Play
+        """
+        plays = list(read_history(os.path.join(HERE, "akali.txt")))
+        assert_equal(len(plays), 3, "akali has 3 plays")
+        assert_equal(plays[-1], Play("Ephemeral Dreamscape", "Celestial Echoes", "Rock", 234, 50, datetime.date(2024, 3, 24)), "last play")
+
+
+    def test_month_range(self):
+        """
+        Test that a month runs from its first day to the first day of the next month, across years too
+        """
+        assert_equal(month_range(6, 2024), (datetime.date(2024, 6, 1), datetime.date(2024, 7, 1)), "June")
+        assert_equal(month_range(12, 2024), (datetime.date(2024, 12, 1), datetime.date(2025, 1, 1)), "December")
+
+    def test_read_history_date_range(self):
+        """
+        Test that only plays in [start, end) are kept, and that either bound can be left out
+        """
+        filename = os.path.join(HERE, "karencat.txt")
+        plays = list(read_history(filename))
+        start, end = month_range(6, 2024)
+        june = list(read_history(filename, start, end))
+        assert_equal(june, [play for play in plays if start <= play.date < end], "plays in June")
+        assert_equal(len(june) > 0 and len(june) < len(plays), True, "some but not all plays are in June")
+        day = list(read_history(filename, datetime.date(2024, 6, 19), datetime.date(2024, 6, 20)))
+        assert_equal({play.date for play in day}, {datetime.date(2024, 6, 19)}, "the end day is excluded")
+        assert_equal(list(read_history(filename, end=start)), [play for play in plays if play.date < start], "no start")
+        assert_equal(list(read_history(filename, start=end)), [], "no end")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+from aggregate import summarise
+from incremental import MonthlyAggregates
+from store import HistoryStore
+
+import os
+import shutil
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PLAY = "Espresso,Sabrina Carpenter,Pop,04:22,03:00,25-02-2024"
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class MonthlyAggregatesTestCases(unittest.TestCase):
+    """
+    Testing the resumable monthly counts kept next to a history file
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, "akali.txt")
+        shutil.copy(os.path.join(HERE, "akali.txt"), self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def append(self, text):
+        with open(self.filename, "a") as f:
+            f.write(text)
+
+    def recounted(self):
+        """
+        The months counted from scratch, to compare an updated store with
+        """
+        aggregates = MonthlyAggregates(self.filename)
+        aggregates.update()
+        return aggregates.months
+
+    def test_summary_matches_summarise(self):
+        """
+        Test that every month's summary matches summarise over the columnar store
+        """
+        aggregates = MonthlyAggregates.open(self.filename)
+        store = HistoryStore.open(self.filename)
+        assert_equal(set(aggregates.months), set(store.months), "months")
+        for year, month in store.months:
+            assert_equal(aggregates.summary(month, year), summarise(store.month(month, year), store), "summary of {}-{}".format(year, month))
+        assert_equal(aggregates.summary(1, 2024), None, "no plays in January")
+
+    def test_append(self):
+        """
+        Test that appended plays are counted on the next open, starting from the saved offset
+        """
+        aggregates = MonthlyAggregates.open(self.filename)
+        plays = aggregates.months[(2024, 2)]["plays"]
+        offset = aggregates.offset
+
+        self.append("\n" + PLAY + "\n")
+        aggregates = MonthlyAggregates.open(self.filename)
+        assert_equal(aggregates.months[(2024, 2)]["plays"], plays + 1, "one more play in February")
+        assert offset < aggregates.offset, "The offset did not move past the appended play"
+        assert_equal(aggregates.update(), False, "nothing new to count")
+        assert_equal(aggregates.months, self.recounted(), "same counts as a full recount")
+
+    def test_pending_last_line(self):
+        """
+        Test that a last line without a line break is counted once, and a line cut short is not counted
+        """
+        aggregates = MonthlyAggregates.open(self.filename)
+        with open(self.filename, "r") as f:
+            last = f.read().split("\n")[-1]
+        assert_equal(aggregates.pending, last, "the sample file's last line is pending")
+
+        self.append("\n" + PLAY[:20])
+        assert_equal(aggregates.update(), True, "the pending line was completed")
+        assert_equal(aggregates.pending, "", "a cut short line is not pending")
+        assert_equal(aggregates.months, self.recounted(), "cut short line is not counted")
+
+        self.append(PLAY[20:])
+        assert_equal(aggregates.update(), True, "the cut short line was completed")
+        assert_equal(aggregates.pending, PLAY, "the completed line is pending")
+        assert_equal(aggregates.months, self.recounted(), "the completed line is counted once")
+
+    def test_rewritten_file(self):
+        """
+        Test that a file rewritten rather than appended to is recounted from scratch
+        """
+        aggregates = MonthlyAggregates.open(self.filename)
+        with open(self.filename, "r") as f:
+            text = f.read()
+        with open(self.filename, "w") as f:
+            f.write(text.replace("Espresso", "Espressa"))
+        assert_equal(aggregates.update(), True, "the rewrite was noticed")
+        assert_equal(aggregates.months, self.recounted(), "same counts as a full recount")
+        assert "Espresso" not in aggregates.months[(2024, 2)]["songs"], "The old song is still counted"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+from parsing import parse_line, parse_seconds, cache_report, clear_caches
+
+import datetime
+import unittest
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class ParsingTestCases(unittest.TestCase):
+    """
+    Testing the shared history line parser and its token caches
+    """
+
+    def setUp(self):
+        clear_caches()
+
+    def tearDown(self):
+        clear_caches()
+
+    def test_parse_line(self):
+        """
+        Test that a line is split into its names, seconds and day
+        """
+        assert_equal(parse_line("Espresso,Sabrina Carpenter,Pop,04:22,00:50,23-02-2024"),
+                     ("Espresso", "Sabrina Carpenter", "Pop", 262, 50, datetime.date(2024, 2, 23)), "parsed line")
+        assert_equal(parse_seconds(" 03:05 "), 185, "whitespace around a duration is ignored")
+
+    def test_malformed_line(self):
+        """
+        Test that a line with missing fields or bad tokens raises ValueError
+        """
+        for line in ["Espresso,Sabrina Carpenter,Pop,04:22,00:50",
+                     "Espresso,Sabrina Carpenter,Pop,4m22s,00:50,23-02-2024",
+                     "Espresso,Sabrina Carpenter,Pop,04:22,00:50,30-02-2024"]:
+            with self.assertRaises(ValueError):
+                parse_line(line)
+
+    def test_tokens_parsed_once(self):
+        """
+        Test that repeated duration and date tokens are served from the caches
+        """
+        for _ in range(3):
+            parse_line("Espresso,Sabrina Carpenter,Pop,04:22,04:22,23-02-2024")
+        report = cache_report()
+        assert_equal((report["seconds"]["misses"], report["seconds"]["hits"]), (1, 5), "seconds cache")
+        assert_equal((report["date"]["misses"], report["date"]["hits"]), (1, 2), "date cache")
+        assert_equal(report["date"]["hit_rate"], 2 / 3, "date hit rate")
+
+
+if __name__ == '__main__':
+    unittest.main()
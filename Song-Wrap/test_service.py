@@ -0,0 +1,96 @@
+from service import WrappedService, load_test, main
+
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import service
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+USERS = ["akali", "karencat"]
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class ServiceTestCases(unittest.TestCase):
+    """
+    Testing the asynchronous Wrapped service with its in-process client
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.passwords = {}
+        for user in USERS:
+            shutil.copy(os.path.join(HERE, user + ".txt"), self.folder)
+            with open(os.path.join(self.folder, user + ".txt"), "r") as f:
+                self.passwords[user] = f.readline().strip()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def load(self, requests, concurrency=8, workers=2):
+        """
+        Runs the requests through a new service and returns the responses and its report
+        """
+        async def run():
+            async with WrappedService(self.folder, workers) as wrapped:
+                responses = await load_test(wrapped, requests, concurrency)
+                return responses, wrapped.report()
+        return asyncio.run(run())
+
+    def test_statuses(self):
+        """
+        Test that every kind of request gets its status and that ok responses carry the month's record
+        """
+        responses, report = self.load([("akali", self.passwords["akali"], 2, 2024),
+                                       ("akali", self.passwords["karencat"], 2, 2024),
+                                       ("nobody", "password", 2, 2024),
+                                       ("akali", self.passwords["akali"], 1, 2024)])
+        assert_equal([response["status"] for response in responses], ["ok", "wrong password", "unknown user", "no plays"], "statuses")
+        assert_equal((responses[0]["username"], responses[0]["year"], responses[0]["month"]), ("akali", 2024, 2), "record of the ok response")
+        assert_equal(report["statuses"], {"ok": 1, "wrong password": 1, "unknown user": 1, "no plays": 1}, "status counts")
+
+    def test_coalescing(self):
+        """
+        Test that concurrent requests for the same user and month share one computation
+        """
+        request = ("karencat", self.passwords["karencat"], 6, 2024)
+        with mock.patch("service.compute_summary", wraps=service.compute_summary) as compute:
+            responses, report = self.load([request] * 20, concurrency=20, workers=1)
+        assert_equal(compute.call_count, 1, "computations")
+        assert_equal(report["coalesced"] > 0, True, "requests were coalesced")
+        assert_equal(report["coalesced"], 19, "every other request joined the first")
+        assert_equal(all(response == responses[0] for response in responses), True, "every request got the same answer")
+
+    def test_report(self):
+        """
+        Test the keys of the report, and that a service with no finished request only counts them
+        """
+        responses, report = self.load([("akali", self.passwords["akali"], 3, 2024)] * 3)
+        assert_equal(sorted(report), sorted(["requests", "throughput", "p50_ms", "p90_ms", "p99_ms", "max_ms", "coalesced", "statuses"]), "report keys")
+        assert_equal(report["requests"], 3, "finished requests")
+        assert_equal(self.load([])[1], {"requests": 0}, "empty report")
+
+    def test_main_without_requests(self):
+        """
+        Test that the load test prints a line instead of failing when no request finishes
+        """
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main(["--folder", self.folder, "--requests", "0"])
+        assert_equal(out.getvalue(), "0 requests finished\n", "output")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+from song import Song, Stream, StreamingHistory, Track, TrackTable
+
+import datetime
+import sys
+import unittest
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class SongTestCases(unittest.TestCase):
+    """
+    Testing the shared Track records and the Streams that point at them
+    """
+
+    def setUp(self):
+        self.total_streaming_time = StreamingHistory.total_streaming_time
+        self.day = datetime.date(2024, 2, 23)
+
+    def tearDown(self):
+        StreamingHistory.total_streaming_time = self.total_streaming_time
+
+    def test_immutable(self):
+        """
+        Test that neither a Track nor a Stream can be changed once created
+        """
+        track = Track("Espresso", "Sabrina Carpenter", "Pop", 262)
+        stream = Stream(track, self.day, 50)
+        with self.assertRaises(AttributeError):
+            track.duration = 1
+        with self.assertRaises(AttributeError):
+            stream.streaming_time = 1
+        with self.assertRaises(AttributeError):
+            stream.song_name = "Please Please Please"
+        assert_equal((track.duration, stream.streaming_time, stream.get_name()), (262, 50, "Espresso"), "unchanged")
+
+    def test_track_table(self):
+        """
+        Test that equal tracks share one Track with interned strings, and different ones do not
+        """
+        table = TrackTable()
+        first = table.track_id("Espresso", "Sabrina Carpenter", "Pop", 262)
+        second = table.track_id("".join(["Espr", "esso"]), "Sabrina Carpenter", "Pop", 262)
+        other = table.track_id("Espresso", "Sabrina Carpenter", "Pop", 263)
+        assert_equal(first, second, "equal tracks get one id")
+        assert_equal(first == other, False, "a different duration is another track")
+        assert_equal(len(table.tracks), 2, "tracks in the table")
+        assert_equal(table.tracks[first] is table.tracks[second], True, "one shared Track")
+        assert_equal(table.tracks[first].song_name is table.tracks[other].song_name, True, "names are interned")
+
+    def test_stream_like_streaming_history(self):
+        """
+        Test that a Stream's getters and comparisons give the same answers as a StreamingHistory of the same play
+        """
+        table = TrackTable()
+        plays = [("Espresso", "Sabrina Carpenter", "Pop", "04:22", "00:50"),
+                 ("Espresso", "Sabrina Carpenter", "Pop", "04:22", "03:10"),
+                 ("Taste", "Sabrina Carpenter", "Pop", "02:37", "02:37"),
+                 ("Fortnight", "Taylor Swift", "Pop", "04:22", "01:00")]
+        histories = [StreamingHistory(*play, self.day) for play in plays]
+        streams = [Stream(table.tracks[table.track_id(h.song_name, h.artist, h.genre, h.duration)], self.day, h.streaming_time) for h in histories]
+        for history, stream in zip(histories, streams):
+            assert_equal((stream.get_name(), stream.get_artist(), stream.get_genre(), stream.get_duration()),
+                         (history.get_name(), history.get_artist(), history.get_genre(), history.get_duration()), "getters")
+            assert_equal(stream.streaming_time, history.streaming_time, "streamed seconds")
+            for other_history, other_stream in zip(histories, streams):
+                assert_equal(stream.is_same(other_stream), history.is_same(other_history), "is_same")
+                assert_equal(stream.has_same_artist(other_stream), history.has_same_artist(other_history), "has_same_artist")
+                longest = stream.get_longest(other_stream)
+                expected = history.get_longest(other_history)
+                assert_equal(longest is None, expected is None, "a tie in get_longest")
+                if longest is not None:
+                    assert_equal(longest.get_name(), expected.get_name(), "get_longest")
+        assert_equal(streams[0] == histories[1], True, "a Stream equals a song with the same name and artist")
+        assert_equal(streams[0].track is streams[1].track, True, "plays of one track share it")
+
+    def test_stream_has_only_its_own_slots(self):
+        """
+        Test that a Stream inherits no unused slots from Song
+        """
+        stream = Stream(Track("Espresso", "Sabrina Carpenter", "Pop", 262), self.day, 50)
+        assert_equal(isinstance(stream, Song), False, "a Stream is not a slotted Song")
+        assert_equal(sys.getsizeof(stream) < sys.getsizeof(Song("Espresso", "Sabrina Carpenter", "Pop", "04:22")), True, "three slots, fewer than a Song")
+
+
+if __name__ == '__main__':
+    unittest.main()
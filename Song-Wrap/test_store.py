@@ -0,0 +1,75 @@
+from history import read_history
+from store import HistoryStore, SONG, DAY, STREAMING_TIME
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def assert_equal(got, expected, msg):
+    """
+    Simple assert helper
+    """
+    assert expected == got, \
+        "[{}] Expected: {}, got: {}".format(msg, expected, got)
+
+
+class HistoryStoreTestCases(unittest.TestCase):
+    """
+    Testing the columnar history cache and its month slices
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, "karencat.txt")
+        shutil.copy(os.path.join(HERE, "karencat.txt"), self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_month_slices(self):
+        """
+        Test that every month slice holds exactly that month's plays, in file order
+        """
+        store = HistoryStore.open(self.filename)
+        plays = list(read_history(self.filename))
+        assert_equal(set(store.months), {(2024, 2), (2024, 3), (2024, 6)}, "months")
+        assert_equal(sum(hi - lo for lo, hi in store.months.values()), len(plays), "every play is in a month")
+        for year, month in store.months:
+            expected = [play for play in plays if (play.date.year, play.date.month) == (year, month)]
+            columns = store.month(month, year)
+            assert_equal([store.songs[code] for code in columns[SONG].tolist()], [play.name for play in expected], "songs of {}-{}".format(year, month))
+            assert_equal(columns[DAY].tolist(), [play.date.toordinal() for play in expected], "days of {}-{}".format(year, month))
+            assert_equal(columns[STREAMING_TIME].tolist(), [play.streaming_time for play in expected], "streaming times of {}-{}".format(year, month))
+
+    def test_empty_month(self):
+        """
+        Test that a month without plays is an empty slice
+        """
+        store = HistoryStore.open(self.filename)
+        assert_equal(store.month(1, 2024).shape, (6, 0), "no plays in January")
+
+    def test_cache_reuse_and_rebuild(self):
+        """
+        Test that the cache is memory-mapped when fresh and rebuilt after the file changes
+        """
+        HistoryStore.open(self.filename)
+        store = HistoryStore.open(self.filename)
+        assert isinstance(store.columns, np.memmap), "A fresh cache is not memory-mapped"
+        february = store.month(2, 2024).shape[1]
+
+        with open(self.filename, "a") as f:
+            f.write("\nEspresso,Sabrina Carpenter,Pop,04:22,01:00,24-02-2024")
+        store = HistoryStore.open(self.filename)
+        assert_equal(store.month(2, 2024).shape[1], february + 1, "the appended play is in February")
+        assert_equal(store.month(2, 2024)[DAY, -1], datetime.date(2024, 2, 24).toordinal(), "the appended play is last")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,26 @@
 from __future__ import annotations
-from song import Song, StreamingHistory
+from song import Song, StreamingHistory, Stream, TrackTable
+from store import HistoryStore, STREAMING_TIME
+from incremental import MonthlyAggregates
+from credentials import credential_store
 import numpy as np
 import math
+import datetime
+
+def verify_password(username: str, password: str, folder: str = "user_info") -> bool | None:
+    '''
+    Verify the authentication of the user without printing anything.
+    Checks the salted hash in the folder's credential store, not the history file.
+
+    @parameters
+    - username: the input username
+    - password: the input password
+    - folder: the folder of user files
+
+    @returns
+    - bool | None: whether the password matches, or None if there is no such user
+    '''
+    return credential_store(folder).verify(username, password)
 
 def check_password(username: str, password: str)-> bool:
     '''
@@ -14,22 +33,15 @@ def check_password(username: str, password: str)-> bool:
     @returns
     - bool: whether the password and username are correct
     '''
-    #create a path to access user information
-    filename = "user_info/" + username + ".txt"
+    verified = verify_password(username, password)
 
     #check if username existed
-    try:
-        f = open(filename,"r")
-    except FileNotFoundError:
+    if verified is None:
         print(f"No {username} found :((")
         return False
 
-    #test if password is correct
-    file_password = f.readline().strip()
-    f.close()
-
     #check if password correct
-    if (password == file_password):
+    if verified:
         print("Login successful :))")
         return True
     else:
@@ -47,32 +59,29 @@ def extract_song_details(filename: str, month: int, year: int) -> list[Song]:
     - year(int): year for which the songs need to be extracted from
 
     @returns 
-    - list[Songs]: A list of Song objects.
+    - list[Songs]: A list of Stream objects, each a slotted Playable sharing one Track per distinct song.
     """
-    f = open(filename,"r")
-    #create list of songs
+    #slice the month out of the user's columnar cache instead of parsing the text file
+    store = HistoryStore.open(filename)
+    columns = store.month(month, year).tolist()
+
+    #every distinct track and day is created once and shared by all its plays
+    table = TrackTable()
+    track_ids = {}
+    dates = {}
     songs = []
-
-    #skip the first line that contain password
-    line = f.readline() 
-
-    #read each line until there is no more line (length of line = 0)
-    line = f.readline()
-    while len(line) != 0:
-        #split the line to get the date via list
-        line_list = line.split(",")
-        line_month = line_list[5].split("-")[1]
-        line_year = line_list[5].split("-")[2]
-        
-        #print line if years and months are matching
-        if int(line_month) == month and int(line_year) == year:
-            #create song object
-            song_object = StreamingHistory(line_list[0],line_list[1],line_list[2],line_list[3],line_list[4],line_list[5])
-            
-            #add the created object into a list
-            songs.append(song_object)
-        line = f.readline()
-    f.close()
+    for song, artist, genre, day, duration, streaming_time in zip(*columns):
+        key = (song, artist, genre, duration)
+        track_id = track_ids.get(key)
+        if track_id is None:
+            track_id = track_ids[key] = table.track_id(store.songs[song], store.artists[artist], store.genres[genre], duration)
+        date = dates.get(day)
+        if date is None:
+            date = dates[day] = datetime.date.fromordinal(day)
+        songs.append(Stream(table.tracks[track_id], date, streaming_time))
+
+    #the class total only covers the songs extracted here, not earlier calls
+    StreamingHistory.total_streaming_time = sum(columns[STREAMING_TIME])
     return songs
     
 def count_streams(songs: list, data_type: str) -> dict[Song]:
@@ -284,34 +293,18 @@ def main():
             print("Year must be an integer :((")
     print()
 
-    # Extract the song details
+    # Look the month up in the user's aggregates, counting only plays appended since the last run
     filename = "user_info/" + username + ".txt"
-    songs = extract_song_details(filename,month,year)
-    song_duration = [song.duration for song in songs]
+    summary = MonthlyAggregates.open(filename).summary(month, year)
 
-    # get streaming data
-    streaming_song = count_streams(songs, "song")
-    streaming_artist = count_streams(songs, "artist")
-    streaming_genre = count_streams(songs, "genre")
-
-    # Compute the most streaming song, artist and genre 
-    top_song = find_most_frequent(streaming_song)
-    top_artist = find_most_frequent(streaming_artist)
-    top_genre = find_most_frequent(streaming_genre)
-
-    # Get favorite songs, artists and genre   
-    favorite_songs = favorite_streams(streaming_song)
-    favorite_artists = favorite_streams(streaming_artist)
-    favorite_genres = favorite_streams(streaming_genre)
-
-    #calculate total duration of songs list in integer
-    total_duration = calculate_streaming_seconds(song_duration)
+    #exit if nothing was streamed in that month, like find_most_frequent
+    if summary is None:
+        exit()
 
-    #get actual_streaming_time
-    actual_streaming_time = StreamingHistory.total_streaming_time
-    
     # Display the Wrapped Wall
-    print_wrapped_wall(top_song, top_artist, top_genre, total_duration, actual_streaming_time, favorite_songs, favorite_artists, favorite_genres)
+    print_wrapped_wall(summary.top_song, summary.top_artist, summary.top_genre,
+                       summary.total_duration, summary.actual_streaming_time,
+                       summary.favorite_songs, summary.favorite_artists, summary.favorite_genres)
 
 
 if __name__ == '__main__':